@@ -1,47 +1,447 @@
+from array import array
 from collections import OrderedDict
+from contextlib import nullcontext
+from multiprocessing import Pool
+import os
+import pickle
+import random
+import threading
+import time
 from classes.visualise_class import Visualise
-from classes.protein_class import Protein
+from classes.protein_class import INTERACTIONS, Protein, pair_tables
+from classes.search_stats import SearchStats
+
+# Fold directions of the steps between neighbouring coordinates
+DIRECTION_FOLDS = {
+    (1, 0, 0): 1, (-1, 0, 0): -1,
+    (0, 1, 0): 2, (0, -1, 0): -2,
+    (0, 0, 1): 3, (0, 0, -1): -3
+}
+
+# Steps between neighbouring coordinates of the fold directions
+FOLD_DIRECTIONS = {fold: direction for direction, fold in DIRECTION_FOLDS.items()}
+
+# Number of free positions after which the dead end flood fill assumes a pocket is large enough
+DEAD_END_FILL_LIMIT = 64
+
+# Default number of seconds between two checkpoints, see Algorithm.enable_checkpoints
+CHECKPOINT_INTERVAL = 60
 
 class Algorithm():
-    def __init__(self, sequence: str, iterations: int, output_file: str, threeD: bool):
+    def __init__(self, sequence: str, iterations: int, output_file: str, threeD: bool, interactions: tuple = INTERACTIONS):
 
         self.sequence = sequence
         self.iterations = iterations
         self.output_file = output_file
         self.threeD = threeD
 
+        # the energy model, the sequence as integer codes and the bonds its amino acids can
+        # form, see pair_tables, and for every amino acid whether it can bond with any other at all
+        self.interactions = interactions
+        self.codes, self.pair_mask, self.pair_weights = pair_tables(sequence, interactions)
+        self.bonding = [1 in row for row in self.pair_mask]
+
         self.best_score = 0
         self.best_protein = None
         self.scores = []
 
-    def run_experiment(self):
+        # number of valid folds found, which parallel runs count without collecting their scores
+        self.valid_folds = 0
+
+        # random number generator of the algorithm, see seed
+        self.random = random.Random()
+
+        # remove moves into pockets that cannot hold the rest of the sequence, see check_legal_moves
+        self.dead_end_pruning = True
+
+        # draw the best fold at the end of run_experiment, see create_output
+        self.plot = True
+
+        # counters and timers of the search, None unless instrument is called
+        self.search_stats = None
+
+        # clock of the experiment, see run_iterations
+        self.start_time = None
+        self.deadline = None
+        self.trace = []
+
+        # checkpoints of the experiment, see enable_checkpoints and resume
+        self.checkpoint_file = None
+        self.checkpoint_interval = CHECKPOINT_INTERVAL
+        self.last_checkpoint = None
+        self.checkpoint_writer = None
+        self.resume_state = None
+        self.completed_iterations = 0
+
+        # Define possible movement directions for 2D or 3D
+        self.directions = [(1, 0, 0), (-1, 0, 0), (0, 1, 0), (0, -1, 0)]
+        if self.threeD:
+            self.directions += [(0, 0, 1), (0, 0, -1)]
+
+        # the positions within one step (including diagonals) of a position, relative to it,
+        # with for each the neighbouring positions among them, see locally_connected
+        box = [
+            (dx, dy, dz) for dx in (-1, 0, 1) for dy in (-1, 0, 1) for dz in ((-1, 0, 1) if self.threeD else (0,))
+            if (dx, dy, dz) != (0, 0, 0)
+        ]
+        self.neighbourhood = {
+            offset: [
+                (offset[0] + dx, offset[1] + dy, offset[2] + dz) for dx, dy, dz in self.directions
+                if (offset[0] + dx, offset[1] + dy, offset[2] + dz) in box
+            ]
+            for offset in box
+        }
+
+    def run_experiment(self, workers: int = 1, seed: int = None, time_budget: float = None):
         """
         Executes the experiment by running the folding algorithm for a specified number of iterations.
         Tracks the best protein configuration based on the score and generates the output after all iterations.
 
+        With more than one worker the iterations are spread over a process pool. Every worker
+        gets its own random number stream, derived from the seed and the worker number, so the
+        same seed and number of workers always give the same best fold.
+
+        With a time budget the experiment stops at the deadline, even in the middle of an
+        iteration, and the best fold found so far is used (see run_iterations).
+
+        Parameters:
+            workers (int): The number of processes to run the iterations in.
+            seed (int): The seed of the random number generators, None for a random seed.
+            time_budget (float): The number of seconds the experiment may take, None for no limit.
+
         Attributes:
             self.iterations (int): The number of iterations to run the algorithm.
             self.best_score (float): The best score observed during the experiment.
             self.best_protein (Protein): The protein configuration corresponding to the best score.
             self.output_file (str): The file where results will be saved.
         """
-        # Initialize the progress bar at the start of the experiment
-        self.progress_bar(0, self.iterations)
-
-        for i in range(self.iterations):
-            # Execute the folding algorithm for the current iteration
-            score = self.run()
+        self.run_iterations(workers, seed, time_budget)
 
-            # If the current score is better (lower), update the best score and configuration
-            self.progress_bar(i + 1, self.iterations)
-            if score <= self.best_score:
-                self.best_score = score
-                self.best_protein = self.protein
+        if self.best_protein is None:
+            print("\nNo valid fold was found within the time budget.")
+            return
 
         # Generate output files and visualizations after completing all iterations
         self.create_output(self.output_file)
 
-    def check_legal_moves(self, amino_acids: OrderedDict):
+    def run_iterations(self, workers: int = 1, seed: int = None, time_budget: float = None):
+        """
+        Runs the iterations of the experiment, without creating the output.
+
+        With a time budget, no new iteration is started after the deadline, and the
+        algorithms check the deadline during an iteration too (see out_of_time): a running
+        iteration either stops with the best fold it found so far, or, if it has not found a
+        fold yet, finishes it as quickly as possible or gives up. Every improvement of the best
+        score is recorded in self.trace as (seconds since the start, best score).
+
+        If the algorithm is resumed from a checkpoint, the iterations continue where the
+        checkpoint left off, and the time budget counts the time before the checkpoint too.
+
+        Parameters:
+            workers (int): The number of processes to run the iterations in.
+            seed (int): The seed of the random number generators, None for a random seed.
+            time_budget (float): The number of seconds the iterations may take, None for no limit.
+
+        Returns:
+            int: The best score.
+        """
+        self.start_clock(time_budget)
+        self.seed(seed)
+
+        if self.resume_state is not None:
+            self.restore_state(self.resume_state)
+            self.resume_state = None
+            print(f"Resumed after {self.completed_iterations} of {self.iterations} iterations.")
+
+        if self.search_stats is not None:
+            self.search_stats.start()
+
+        if workers > 1 and self.iterations - self.completed_iterations > 1:
+            self.run_parallel(workers, seed)
+        else:
+            # Initialize the progress bar at the start of the experiment
+            self.progress_bar(self.completed_iterations, self.iterations)
+
+            for i in range(self.completed_iterations, self.iterations):
+                # Execute the folding algorithm for the current iteration
+                score = self.run()
+
+                # The iteration was stopped at the deadline before it found a fold
+                if score is None:
+                    break
+
+                # If the current score is better (lower), update the best score and configuration
+                self.progress_bar(i + 1, self.iterations)
+                if score <= self.best_score:
+                    self.best_score = score
+                    self.best_protein = self.protein
+                self.record_score(score)
+                self.completed_iterations = i + 1
+                self.checkpoint()
+
+                if self.search_stats is not None:
+                    self.search_stats.end_step(iteration=i, score=score)
+
+                if self.out_of_time():
+                    break
+
+        if self.checkpoint_file is not None:
+            self.save_checkpoint(wait=True)
+
+        if self.search_stats is not None:
+            self.search_stats.finish()
+
+        if self.out_of_time():
+            print(f"\nTime budget of {time_budget} seconds reached.")
+
+        return self.best_score
+
+    def start_clock(self, time_budget: float = None):
+        """
+        Starts the clock of the experiment, see run_iterations.
+
+        Parameters:
+            time_budget (float): The number of seconds the experiment may take, None for no limit.
+        """
+        self.start_time = time.time()
+        self.deadline = self.start_time + time_budget if time_budget is not None else None
+        self.last_checkpoint = self.start_time
+        self.trace = []
+
+    def out_of_time(self):
+        """
+        Determines if the deadline of the experiment has passed.
+
+        Returns:
+            bool: True if there is a time budget and it has been used up.
+        """
+        return self.deadline is not None and time.time() >= self.deadline
+
+    def record_score(self, score: int):
+        """
+        Adds a score to the trace of the experiment if it improves the best score so far.
+
+        Parameters:
+            score (int): The score of a fold that was found.
+        """
+        if self.start_time is not None and (not self.trace or score < self.trace[-1][1]):
+            self.trace.append((time.time() - self.start_time, score))
+
+    def enable_checkpoints(self, checkpoint_file: str, interval: float = CHECKPOINT_INTERVAL):
+        """
+        Writes the state of the experiment to a file at most every `interval` seconds during
+        the next run_experiment, and once more at the end, so it can be resumed (see resume).
+
+        Checkpoints are written between the iterations of the serial loop, and Beam also
+        writes them between its steps. The other algorithms that run a single iteration can
+        only be resumed once it has finished. The state is pickled in between two steps, and
+        written to disk in a background thread, so the search does not wait for the disk. The
+        file is replaced in one go, so a crash during a write leaves the previous checkpoint intact.
+
+        Parameters:
+            checkpoint_file (str): The file to write the checkpoints to.
+            interval (float): The minimum number of seconds between two checkpoints.
+        """
+        self.checkpoint_file = checkpoint_file
+        self.checkpoint_interval = interval
+
+    def resume(self, checkpoint_file: str):
+        """
+        Continues the next run_experiment from a checkpoint written by enable_checkpoints.
+
+        The algorithm has to be created with the same settings as the one that wrote the
+        checkpoint; only the algorithm, the sequence and the dimension are checked.
+
+        Parameters:
+            checkpoint_file (str): The file the checkpoint was written to.
+        """
+        with open(checkpoint_file, 'rb') as file:
+            state = pickle.load(file)
+
+        if (state["algorithm"], state["sequence"], state["threeD"]) != (type(self).__name__, self.sequence, self.threeD):
+            raise ValueError(
+                f"The checkpoint in {checkpoint_file} belongs to {state['algorithm']} on {state['sequence']} "
+                f"in {'3D' if state['threeD'] else '2D'}."
+            )
+        self.resume_state = state
+
+    def checkpoint_state(self):
+        """
+        Collects the state of the experiment for a checkpoint. Algorithms that can be
+        resumed in the middle of an iteration add their own state to it.
+
+        Returns:
+            dict: The state of the experiment, made of picklable built-in types and arrays.
+        """
+        best_folds = array('b', self.best_protein.folds) if self.best_protein is not None else None
+        return {
+            "algorithm": type(self).__name__,
+            "sequence": self.sequence,
+            "threeD": self.threeD,
+            "iterations": self.completed_iterations,
+            "best score": self.best_score,
+            "best folds": best_folds,
+            "scores": array('i', self.scores),
+            "valid folds": self.valid_folds,
+            "trace": list(self.trace),
+            "seconds": time.time() - self.start_time,
+            "random": self.random.getstate()
+        }
+
+    def restore_state(self, state: dict):
+        """
+        Restores the state of the experiment from a checkpoint, see checkpoint_state.
+
+        Parameters:
+            state (dict): The state that was written to the checkpoint.
+        """
+        self.completed_iterations = state["iterations"]
+        self.best_score = state["best score"]
+        if state["best folds"] is not None:
+            self.best_protein = self.calculate_protein(list(state["best folds"]))
+            self.best_protein.folds = list(state["best folds"])
+        self.scores = list(state["scores"])
+        self.valid_folds = state["valid folds"]
+        self.trace = list(state["trace"])
+        self.random.setstate(state["random"])
+
+        # the clock continues from the time of the checkpoint
+        self.start_time -= state["seconds"]
+        if self.deadline is not None:
+            self.deadline -= state["seconds"]
+
+    def checkpoint(self):
+        """
+        Writes a checkpoint if checkpoints are enabled and the last one is at least the interval ago.
+        """
+        if self.checkpoint_file is not None and time.time() - self.last_checkpoint >= self.checkpoint_interval:
+            self.save_checkpoint()
+
+    def save_checkpoint(self, wait: bool = False):
+        """
+        Writes a checkpoint in a background thread, see enable_checkpoints. If the previous
+        checkpoint is still being written, this one is skipped and the next call tries again.
+
+        Parameters:
+            wait (bool): Wait for the previous and this checkpoint to be written, as at the end of the experiment.
+        """
+        if self.checkpoint_writer is not None and self.checkpoint_writer.is_alive():
+            if not wait:
+                return
+            self.checkpoint_writer.join()
+
+        data = pickle.dumps(self.checkpoint_state(), protocol=pickle.HIGHEST_PROTOCOL)
+        self.last_checkpoint = time.time()
+        self.checkpoint_writer = threading.Thread(target=write_checkpoint, args=(self.checkpoint_file, data), daemon=True)
+        self.checkpoint_writer.start()
+
+        if wait:
+            self.checkpoint_writer.join()
+            print(f"\nCheckpoint written to {self.checkpoint_file}")
+
+    def instrument(self, output_file: str = None, profile_file: str = None):
+        """
+        Attaches counters and timers to the algorithm for the next run_experiment (see SearchStats).
+
+        The algorithms count what they do per step: per amino acid for Beam, and per
+        iteration for the others. Without instrumentation the algorithms only check whether
+        self.search_stats is None. Worker processes are not instrumented.
+
+        Parameters:
+            output_file (str): The file to write a JSON line to for every step, None for the summary only.
+            profile_file (str): The file to write the cProfile statistics of the run to, None to not profile.
+        """
+        self.search_stats = SearchStats(output_file, profile_file)
+
+    def phase(self, name: str):
+        """
+        Times a phase of the current step if the algorithm is instrumented, as in `with self.phase("expand"): ...`.
+
+        Parameters:
+            name (str): The name of the phase.
+
+        Returns:
+            The timer of the phase, or a context that does nothing without instrumentation.
+        """
+        if self.search_stats is None:
+            return nullcontext()
+        return self.search_stats.phase(name)
+
+    def __getstate__(self):
+        """
+        Leaves the instrumentation and the checkpoint writer out when the algorithm is sent to a worker process.
+
+        Returns:
+            dict: The attributes of the algorithm.
+        """
+        state = self.__dict__.copy()
+        state["search_stats"] = None
+        state["checkpoint_writer"] = None
+        return state
+
+    def run_parallel(self, workers: int, seed: int):
+        """
+        Runs the iterations of the experiment spread over a pool of worker processes.
+
+        The workers only send back the score and folds of their best fold, their number of
+        valid folds and their traces; the scores of the other folds stay in the workers, and
+        the protein of the best fold is rebuilt from its folds afterwards. No checkpoints are
+        written while the workers run. When resuming, the workers are seeded from the restored
+        random number generator, so they do not repeat the iterations of the first run.
+
+        Parameters:
+            workers (int): The number of processes to run the iterations in.
+            seed (int): The seed of the random number generators, None for a random seed.
+        """
+        iterations = self.iterations - self.completed_iterations
+        workers = min(workers, iterations)
+
+        # after a resume the streams of the workers follow from the restored generator; seeded
+        # like a new run, they would repeat the first iterations of that run
+        if self.completed_iterations and seed is not None:
+            seed = self.random.getrandbits(64)
+
+        tasks = [
+            (self, worker, iterations // workers + (worker < iterations % workers), seed)
+            for worker in range(workers)
+        ]
+
+        with Pool(workers) as pool:
+            results = pool.map(run_worker, tasks)
+
+        # results are in worker order, so ties are broken the same way every time
+        best_folds = None
+        points = []
+        for (score, folds), valid_folds, trace in results:
+            self.valid_folds += valid_folds
+            points.extend(trace)
+            if folds is not None and score <= self.best_score:
+                self.best_score = score
+                best_folds = folds
+
+        # the trace of the experiment is made of the improvements of all workers together
+        for seconds, score in sorted(points):
+            if not self.trace or score < self.trace[-1][1]:
+                self.trace.append((seconds, score))
+
+        if best_folds is not None:
+            self.protein = self.calculate_protein(best_folds)
+            self.finish_up()
+            self.best_protein = self.protein
+
+        self.completed_iterations = self.iterations
+
+    def seed(self, seed: int = None, worker: int = 0):
+        """
+        Seeds the random number generator of the algorithm.
+
+        Parameters:
+            seed (int): The seed, None for a random seed.
+            worker (int): The number of the worker, every worker gets its own stream.
+        """
+        self.random = random.Random(None if seed is None else f"{seed}-{worker}")
+
+    def check_legal_moves(self, amino_acids: OrderedDict, remaining: int = None):
         """
         Determines the set of legal moves for the next amino acid in the sequence.
 
@@ -49,42 +449,347 @@ class Algorithm():
         1. Not already occupied by other amino acids.
         2. Not surrounded in all possible directions by existing amino acids (to prevent overlap).
 
+        If the number of remaining amino acids is given, the last amino acid may also be placed
+        in a surrounded position, and with dead end pruning enabled the moves into a pocket
+        that cannot hold the rest of the sequence are removed as well (see remove_dead_ends).
+
         Parameters:
             amino_acids (OrderedDict): A dictionary where keys are coordinates (x, y, z)
                                        and values are the corresponding amino acid types.
+            remaining (int): The number of amino acids still to place, including the next one.
 
         Returns:
             set[tuple[int, int, int]] or None: A set of legal moves (coordinates) or None
                                                if no legal moves are available.
         """
+        if self.search_stats is not None:
+            self.search_stats.count("legal move calls")
+
         # Get the coordinates of the last placed amino acid
         x, y, z = next(reversed(amino_acids))
 
-        # Define possible movement directions for 2D or 3D
-        directions = [(1, 0, 0), (-1, 0, 0), (0, 1, 0), (0, -1, 0)]
-        if self.threeD:
-            directions += [(0, 0, 1), (0, 0, -1)]
-
-        # Calculate potential legal moves by applying all directions to the current position
-        legal_moves = {(x + dx, y + dy, z + dz) for dx, dy, dz in directions}
+        directions = self.directions
 
-        # Remove moves that overlap with existing amino acids
-        legal_moves -= amino_acids.keys()
-
-        # Remove moves surrounded in all directions by existing amino acids
-        moves_to_remove = {
-            move for move in legal_moves
-            if all(
-                (move[0] + dx, move[1] + dy, move[2] + dz) in amino_acids
-                for dx, dy, dz in directions
-                if (dx, dy, dz) != (0, 0, 0)
-            )
+        # Potential legal moves are the free positions next to the current position
+        legal_moves = {
+            move for move in ((x + dx, y + dy, z + dz) for dx, dy, dz in directions)
+            if move not in amino_acids
         }
-        legal_moves -= moves_to_remove
+
+        if remaining is not None and self.dead_end_pruning:
+            legal_moves = self.remove_dead_ends(amino_acids, legal_moves, remaining)
+        elif remaining != 1:
+            # Remove moves surrounded in all directions by existing amino acids
+            legal_moves = {
+                move for move in legal_moves
+                if not all(
+                    (move[0] + dx, move[1] + dy, move[2] + dz) in amino_acids
+                    for dx, dy, dz in directions
+                )
+            }
 
         # Return the legal moves or None if no valid moves remain
         return legal_moves if legal_moves else None
 
+    def remove_dead_ends(self, amino_acids: dict, legal_moves: set, remaining: int):
+        """
+        Removes the moves into a pocket of free positions that cannot hold the rest of the sequence.
+
+        The free positions reachable from a move are counted with a flood fill, which stops
+        as soon as enough positions are found (or DEAD_END_FILL_LIMIT, beyond which a pocket is
+        assumed to be large enough). The lattice is bipartite, so the chain alternates between
+        even and odd positions; a pocket that is explored completely also needs enough
+        positions of each parity. Moves that end up in the same pocket share one flood fill.
+
+        The last amino acid itself passed this check, so if all moves are connected through
+        the free positions around it they share its pocket, which is known to fit the rest of
+        the sequence, and no flood fill is needed.
+
+        Parameters:
+            amino_acids (dict): The coordinates and types of the placed amino acids.
+            legal_moves (set[tuple[int, int, int]]): The free positions next to the last amino acid.
+            remaining (int): The number of amino acids still to place, including the next one.
+
+        Returns:
+            set[tuple[int, int, int]]: The legal moves that do not lead into a dead end.
+        """
+        if remaining <= 1 or not legal_moves or self.locally_connected(amino_acids, legal_moves):
+            return legal_moves
+
+        limit = min(remaining, DEAD_END_FILL_LIMIT)
+        pockets = []
+        result = set()
+        for move in legal_moves:
+            for pocket, fits in pockets:
+                if move in pocket:
+                    break
+            else:
+                pocket = {move}
+                counts = [0, 0]
+                counts[sum(move) % 2] += 1
+                frontier = [move]
+                while frontier and len(pocket) < limit:
+                    x, y, z = frontier.pop()
+                    for dx, dy, dz in self.directions:
+                        neighbour = (x + dx, y + dy, z + dz)
+                        if neighbour not in amino_acids and neighbour not in pocket:
+                            pocket.add(neighbour)
+                            counts[sum(neighbour) % 2] += 1
+                            frontier.append(neighbour)
+
+                if len(pocket) >= limit and frontier:
+                    # the flood fill stopped early, so the pocket is large enough
+                    fits = True
+                else:
+                    fits = len(pocket) >= remaining
+                    if fits and len(pocket) < DEAD_END_FILL_LIMIT:
+                        # the chain starts on the parity of the move and alternates from there
+                        parity = sum(move) % 2
+                        fits = counts[parity] >= (remaining + 1) // 2 and counts[1 - parity] >= remaining // 2
+                pockets.append((pocket, fits))
+
+            if fits:
+                result.add(move)
+
+        return result
+
+    def locally_connected(self, amino_acids: dict, legal_moves: set):
+        """
+        Determines if the legal moves are connected through the free positions around the last amino acid.
+
+        Parameters:
+            amino_acids (dict): The coordinates and types of the placed amino acids.
+            legal_moves (set[tuple[int, int, int]]): The free positions next to the last amino acid.
+
+        Returns:
+            bool: True if every move can be reached from every other move within one step of the last amino acid.
+        """
+        if len(legal_moves) < 2:
+            return True
+
+        # positions are taken relative to the last amino acid, see self.neighbourhood
+        x, y, z = next(reversed(amino_acids))
+        moves = {(mx - x, my - y, mz - z) for mx, my, mz in legal_moves}
+        start = next(iter(moves))
+        reached = {start}
+        frontier = [start]
+        while frontier:
+            for offset in self.neighbourhood[frontier.pop()]:
+                if offset not in reached and (x + offset[0], y + offset[1], z + offset[2]) not in amino_acids:
+                    reached.add(offset)
+                    frontier.append(offset)
+
+        return moves <= reached
+
+    def contact_bound(self, index: int, free_slots: list[int]):
+        """
+        Calculates an optimistic (admissible) bound on the points the amino acids from
+        `index` onwards can still gain, see calculate_slot_counts and count_free_slots.
+
+        Every new bond involves at least one amino acid that is not placed yet. A bond with
+        a placed amino acid takes one of its free neighbours, of which there are only
+        `free_slots`, while a bond between two remaining amino acids takes a free neighbour
+        of both, so it is counted for half on each side. The remaining neighbours with the
+        most points are assumed to bond with the placed amino acids. When every bond is
+        worth the fewest points, the bonds between remaining amino acids are limited by the
+        number of free neighbours at the scarcer parity instead.
+
+        Parameters:
+            index (int): The position in the sequence of the next amino acid to place.
+            free_slots (list[int]): The free neighbours of the placed H and C amino acids, by parity.
+
+        Returns:
+            int: The bound, as a (negative) number of points.
+        """
+        # the next amino acid takes one free neighbour of the end of the chain without bonding
+        free_slots = list(free_slots)
+        if self.bonding[index - 1]:
+            free_slots[(index - 1) % 2] -= 1
+
+        strong_points, weak_points = self.slot_points
+        double_gain = 0
+        remaining = []
+        for parity in range(2):
+            strong_slots, weak_slots = self.slot_counts[index][parity]
+            placed = free_slots[1 - parity]
+
+            placed_strong = min(strong_slots, placed)
+            placed_weak = min(weak_slots, placed - placed_strong)
+            double_gain += 2 * (strong_points * placed_strong + weak_points * placed_weak)
+            remaining.append((strong_slots - placed_strong, weak_slots - placed_weak))
+
+        if remaining[0][0] or remaining[1][0]:
+            # bonds between remaining amino acids are counted for half on each side
+            double_gain += sum(strong_points * strong_slots + weak_points * weak_slots for strong_slots, weak_slots in remaining)
+        else:
+            # every bond is worth the fewest points, and each one pairs neighbours of opposite parity
+            double_gain += 2 * weak_points * min(remaining[0][1], remaining[1][1])
+
+        return -(double_gain // 2)
+
+    def calculate_slot_counts(self):
+        """
+        Counts the free neighbours the amino acids from every position onwards bring into
+        the fold, by the points a bond through them can score at most, see contact_bound.
+
+        An amino acid has at most 2 (2D) or 4 (3D) free neighbours, one more at the end of
+        the chain. The lattice is bipartite, so it can only bond with amino acids an odd
+        number of positions away, and scores the most points with the best such partner.
+        The neighbours are split into those of amino acids whose best bond is the weakest
+        one of the sequence, and the others, which are counted as the strongest bond; with
+        the default energy model these are the bonds of 1 and of 5 points.
+
+        Returns:
+            list: slot_counts[i][parity] is a pair (neighbours worth the strongest bond,
+                  neighbours worth the weakest bond) of the amino acids i, i + 1, ... with that parity.
+        """
+        length = len(self.sequence)
+        slot_counts = [[(0, 0), (0, 0)] for _ in range(length + 1)]
+
+        # best points per bond of every amino acid with any amino acid it can bond with, see pair_tables
+        best_points = [-min(row) for row in self.pair_weights]
+        bonding_points = [points for points in best_points if points > 0]
+        self.slot_points = (max(bonding_points, default=0), min(bonding_points, default=0))
+
+        for index in range(length - 1, -1, -1):
+            free_neighbours = len(self.directions) - (1 if index == length - 1 else 2)
+
+            slot_counts[index] = list(slot_counts[index + 1])
+            strong_slots, weak_slots = slot_counts[index][index % 2]
+            if best_points[index] == self.slot_points[1]:
+                weak_slots += free_neighbours
+            elif best_points[index] > 0:
+                strong_slots += free_neighbours
+            slot_counts[index][index % 2] = (strong_slots, weak_slots)
+
+        return slot_counts
+
+    def count_free_slots(self, positions: dict):
+        """
+        Counts the free neighbours of the placed amino acids that can bond (the H and C amino
+        acids, see pair_tables), by the parity of their position in the chain, for contact_bound.
+        Algorithms that place one amino acid at a time can keep the counts up to date with
+        slot_changes instead.
+
+        Parameters:
+            positions (dict): The position in the chain of the placed amino acids, {coordinate: index}.
+
+        Returns:
+            list[int]: The number of free neighbours at even and at odd positions.
+        """
+        free_slots = [0, 0]
+        for (x, y, z), index in positions.items():
+            if self.bonding[index]:
+                free_slots[index % 2] += sum(
+                    (x + dx, y + dy, z + dz) not in positions for dx, dy, dz in self.directions
+                )
+        return free_slots
+
+    def slot_changes(self, positions: dict, move: tuple[int, int, int], index: int):
+        """
+        Determines how placing an amino acid changes the free neighbours of count_free_slots:
+        it takes a free neighbour of every amino acid around it that can bond, and brings its
+        own free neighbours if it can bond itself.
+
+        Parameters:
+            positions (dict): The position in the chain of the placed amino acids, {coordinate: index}.
+            move (tuple): The (x, y, z) coordinates of the new amino acid.
+            index (int): The position in the chain of the new amino acid.
+
+        Returns:
+            tuple[int, int]: The free neighbours taken at the other parity, and added at the parity of the move.
+        """
+        x, y, z = move
+        bonding = self.bonding
+        taken = 0
+        free = 0
+        for dx, dy, dz in self.directions:
+            neighbour = positions.get((x + dx, y + dy, z + dz))
+            if neighbour is None:
+                free += 1
+            elif bonding[neighbour]:
+                taken += 1
+        return taken, (free if bonding[index] else 0)
+
+    def canonical_moves(self, moves: set, last: tuple[int, int, int], symmetry: int):
+        """
+        Removes the moves that can only lead to mirror images or rotations of folds that
+        are reachable through the other moves.
+
+        Parameters:
+            moves (set or None): The legal moves from the last placed amino acid.
+            last (tuple): The (x, y, z) coordinates of the last placed amino acid.
+            symmetry (int): The symmetry level of the chain, see allowed_fold.
+
+        Returns:
+            set[tuple[int, int, int]] or None: The canonical moves or None if none remain.
+        """
+        if not moves or symmetry == 2:
+            return moves
+
+        x, y, z = last
+        moves = {
+            move for move in moves
+            if self.allowed_fold(DIRECTION_FOLDS[(move[0] - x, move[1] - y, move[2] - z)], symmetry)
+        }
+        return moves if moves else None
+
+    def allowed_fold(self, fold: int, symmetry: int):
+        """
+        Determines if a fold leads to a canonical fold of the protein.
+
+        The first bond is fixed along the x-axis, which leaves the mirror images in 2D and
+        the rotations around the x-axis and mirror images in 3D. These are removed by
+        demanding that the first fold off the x-axis is in the positive y direction and,
+        in 3D, that the first fold out of the xy-plane is in the positive z direction.
+
+        Parameters:
+            fold (int): The fold direction (1, -1, 2, -2, 3 or -3).
+            symmetry (int): 0 while the chain lies on the x-axis, 1 while it lies in the
+                            xy-plane (3D only) and 2 once it left the plane.
+
+        Returns:
+            bool: True if the fold is allowed.
+        """
+        if symmetry == 0:
+            return fold in (1, -1, 2)
+        if symmetry == 1:
+            return fold != -3
+        return True
+
+    def next_symmetry(self, symmetry: int, fold: int):
+        """
+        Determines the symmetry level of the chain after a fold, see allowed_fold.
+
+        Parameters:
+            symmetry (int): The symmetry level before the fold.
+            fold (int): The fold direction.
+
+        Returns:
+            int: The symmetry level after the fold.
+        """
+        if symmetry == 0 and fold == 2:
+            return 1 if self.threeD else 2
+        if symmetry == 1 and fold == 3:
+            return 2
+        return symmetry
+
+    def move_symmetry(self, symmetry: int, last: tuple[int, int, int], move: tuple[int, int, int]):
+        """
+        Determines the symmetry level of the chain after a move, see allowed_fold.
+
+        Parameters:
+            symmetry (int): The symmetry level before the move.
+            last (tuple): The (x, y, z) coordinates of the last placed amino acid.
+            move (tuple): The (x, y, z) coordinates of the new amino acid.
+
+        Returns:
+            int: The symmetry level after the move.
+        """
+        if symmetry == 2:
+            return symmetry
+        return self.next_symmetry(symmetry, DIRECTION_FOLDS[(move[0] - last[0], move[1] - last[1], move[2] - last[2])])
+
     def finish_up(self):
         """
         Finalizes the folding process for the protein.
@@ -104,7 +809,7 @@ class Algorithm():
 
         This method performs the following actions:
         1. Converts the best protein's amino acid sequence and fold data to a CSV file.
-        2. Draws a visualization of the best protein's folding structure.
+        2. Draws a visualization of the best protein's folding structure, unless self.plot is False.
         3. Analyzes and visualizes the folding process of the current protein.
 
         Parameters:
@@ -117,7 +822,8 @@ class Algorithm():
         Visualise.data_to_csv(self.best_protein.amino_acids, self.best_protein.folds, output_file, self.best_protein)
 
         # Draw a visualization of the best protein's folding structure
-        Visualise.draw(self.best_protein, self.best_score)
+        if self.plot:
+            Visualise.draw(self.best_protein, self.best_score)
 
         # Perform an analysis for the algorithm
         # Visualise.analysis(self.protein, self.scores)
@@ -137,13 +843,6 @@ class Algorithm():
             None
         """
         if len(self.protein.amino_acids) == len(self.protein.sequence):
-            # Map differences in coordinates to fold directions
-            direction_map = {
-                (1, 0, 0): 1, (-1, 0, 0): -1,
-                (0, 1, 0): 2, (0, -1, 0): -2,
-                (0, 0, 1): 3, (0, 0, -1): -3
-            }
-
             # Iterate through amino acids to calculate folds
             amino_acids_list = list(self.protein.amino_acids.items())
             for i in range(1, len(amino_acids_list) - 1):
@@ -154,8 +853,8 @@ class Algorithm():
                 # Calculate the difference in coordinates
                 delta = (x_next - x, y_next - y, z_next - z)
 
-                # Determine the fold direction and append to folds
-                fold = direction_map.get(delta)
+                # Determine the fold direction and append to folds, see DIRECTION_FOLDS
+                fold = DIRECTION_FOLDS.get(delta)
                 if fold is not None:
                     self.protein.folds.append(fold)
         else:
@@ -178,29 +877,56 @@ class Algorithm():
         Returns:
             Protein: A new Protein object with the calculated 3D coordinates.
         """
+        if self.search_stats is not None:
+            self.search_stats.count("copies made")
+
         x,y,z = 1,0,0
 
-        new_protein = Protein(self.protein.sequence, self.protein.output_file, self.protein.threeD)
+        new_protein = Protein(self.sequence, self.output_file, self.threeD, self.interactions)
 
-        # Map fold directions to coordinate changes
-        direction_map = {
-            1: (1, 0, 0), -1: (-1, 0, 0),
-            2: (0, 1, 0), -2: (0, -1, 0),
-            3: (0, 0, 1), -3: (0, 0, -1)
-        }
+        # Skip the first fold (the first 2 amino acids are fixed) and the last fold if present (0 is a placeholder)
+        for i, fold in enumerate(folds[1:len(self.sequence) - 1], start=2):
 
-        # Skip the first 2 folds and exclude the last fold (0 is a placeholder)
-        for i, fold in enumerate(folds[2:-1], start=2):
-
-            # Update coordinates based on the fold direction
-            dx, dy, dz = direction_map.get(fold, (0, 0, 0))
+            # Update coordinates based on the fold direction, see FOLD_DIRECTIONS
+            dx, dy, dz = FOLD_DIRECTIONS.get(fold, (0, 0, 0))
             x, y, z = x + dx, y + dy, z + dz
 
             # Add the new coordinate and amino acid to the protein
-            new_protein.add_coordinate((x, y, z), self.protein.sequence[i])
+            new_protein.add_coordinate((x, y, z), self.sequence[i])
 
         return new_protein
 
+    def coordinates_to_folds(self, coordinates: list[tuple[int, int, int]]):
+        """
+        Calculates the fold directions of a chain of coordinates anywhere on the lattice.
+
+        The folds are turned so that the first fold is 1, as Protein fixes the first two
+        amino acids at (0,0,0) and (1,0,0). This swaps the axis of the first fold with the
+        x-axis and flips both if the first fold is negative, which keeps all bonds intact.
+
+        Parameters:
+            coordinates (list[tuple[int, int, int]]): The coordinates of the amino acids, in chain order.
+
+        Returns:
+            list[int]: The fold directions, starting with 1 and without the trailing 0.
+        """
+        folds = [
+            DIRECTION_FOLDS[(x2 - x1, y2 - y1, z2 - z1)]
+            for (x1, y1, z1), (x2, y2, z2) in zip(coordinates, coordinates[1:])
+        ]
+
+        first_axis, first_sign = abs(folds[0]), (1 if folds[0] > 0 else -1)
+        turned_folds = []
+        for fold in folds:
+            axis, sign = abs(fold), (1 if fold > 0 else -1)
+            if axis == first_axis:
+                axis, sign = 1, sign * first_sign
+            elif axis == 1:
+                axis, sign = first_axis, sign * first_sign
+            turned_folds.append(axis * sign)
+
+        return turned_folds
+
     def progress_bar(self, progress, total):
         """
         Displays a progress bar in the console to visualize the completion percentage.
@@ -218,3 +944,51 @@ class Algorithm():
         percent = 100 * (progress / float(total))
         bar = chr(9608) * int(percent) + '-'* (100 - int(percent))
         print(f"\r|{bar}| {percent: .2f}%", end="")
+
+def run_worker(task: tuple):
+    """
+    Runs a share of the iterations of an experiment in a worker process.
+
+    Parameters:
+        task (tuple): (algorithm, worker number, number of iterations, seed)
+
+    Returns:
+        tuple: ((best score, best folds), number of valid folds of the worker, trace of the worker)
+    """
+    algorithm, worker, iterations, seed = task
+    algorithm.seed(seed, worker)
+
+    # the scores and trace restored from a checkpoint are already in the main process,
+    # so the worker only counts its own
+    algorithm.scores = []
+    algorithm.valid_folds = 0
+    algorithm.trace = []
+
+    best = (float("inf"), None)
+    for _ in range(iterations):
+        score = algorithm.run()
+        if score is None:
+            break
+        if score <= best[0]:
+            best = (score, list(algorithm.protein.folds))
+        algorithm.record_score(score)
+        if algorithm.out_of_time():
+            break
+
+    return best, algorithm.valid_folds, algorithm.trace
+
+def write_checkpoint(checkpoint_file: str, data: bytes):
+    """
+    Writes a pickled checkpoint to a temporary file and then replaces the checkpoint file
+    with it, so the checkpoint file always holds a complete checkpoint.
+
+    Parameters:
+        checkpoint_file (str): The file to write the checkpoint to.
+        data (bytes): The pickled state of the experiment.
+    """
+    temporary_file = checkpoint_file + ".tmp"
+    with open(temporary_file, 'wb') as file:
+        file.write(data)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temporary_file, checkpoint_file)
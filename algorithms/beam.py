@@ -1,8 +1,13 @@
-from collections import OrderedDict
-from queue import Queue
-import copy
-from .algorithm_class import Algorithm
-from classes.protein_class import Protein
+import heapq
+from array import array
+from multiprocessing import Pool
+from .algorithm_class import Algorithm, DIRECTION_FOLDS, FOLD_DIRECTIONS
+from classes.protein_class import INTERACTIONS, Protein
+from classes.fold_state import FoldState
+from classes.transposition_table import TranspositionTable
+
+# Beam width of the steps after the deadline of a time budget, see Beam.run
+DEADLINE_WIDTH = 10
 
 class Beam(Algorithm):
     """
@@ -11,7 +16,8 @@ class Beam(Algorithm):
     Maintains a beam of top candidate states and explores possible folds while
     considering potential future moves through lookahead simulation.
     """
-    def __init__(self, sequence: str, max_size: int, output_file: str, threeD: bool, lookahead_depth: int = 0):
+    def __init__(self, sequence: str, max_size: int, output_file: str, threeD: bool, lookahead_depth: int = 0, cache_size: int = 100000, workers: int = 1,
+                 dead_end_pruning: bool = True, heuristic: bool = False, heuristic_weight: float = 0.25, interactions: tuple = INTERACTIONS):
         """
         Initialize Beam Search algorithm.
 
@@ -21,13 +27,56 @@ class Beam(Algorithm):
             output_file: Path to save output files
             threeD: True for 3D folding, False for 2D
             lookahead_depth: Number of future steps to consider during simulation
+            cache_size: Maximum number of positions kept in the lookahead transposition table (0 disables it)
+            workers: Number of processes the beam is expanded in
+            dead_end_pruning: Remove moves into pockets that cannot hold the rest of the sequence
+            heuristic: Rank the candidates by their score plus the contact bound instead of the lookahead
+            heuristic_weight: Weight of the contact bound in the ranking. The bound is far from
+                              tight, so below about 1/3 it mostly breaks ties between equal scores
+            interactions: Points of a bond between two amino acid types, see INTERACTIONS
         """
-        super().__init__(sequence, 1, output_file, threeD)
-        self.protein = Protein(sequence, output_file, threeD)
-        self.states = [self.protein]
+        super().__init__(sequence, 1, output_file, threeD, interactions)
+        self.dead_end_pruning = dead_end_pruning
+        self.protein = Protein(sequence, output_file, threeD, interactions)
+        self.states = [FoldState.initial(sequence)]
         self.max_size = max_size
         self.lookahead_depth = lookahead_depth
 
+        # Optimistic estimate of the points the rest of the chain can gain, see evaluate_move
+        self.heuristic = heuristic
+        self.heuristic_weight = heuristic_weight
+        if heuristic:
+            self.slot_counts = self.calculate_slot_counts()
+
+        # Number of candidates merged into an equivalent state, per step
+        self.duplicates = []
+
+        # Lookahead results of positions that were already simulated, and the start of the tail
+        # of amino acids that cannot bond, where the simulation stops (see cache_key)
+        self.cache = TranspositionTable(cache_size) if cache_size > 0 else None
+        self.tail_start = max((index + 1 for index, bonding in enumerate(self.bonding) if bonding), default=0)
+
+        # Process pool that expands the beam, only while running with more than one worker
+        self.workers = workers
+        self.pool = None
+
+        # Step the run starts at, and the step in progress, see checkpoint_state
+        self.first_step = 0
+        self.current_step = None
+
+    def run_experiment(self, workers: int = 1, seed: int = None, time_budget: float = None):
+        """
+        Execute the experiment. Beam search runs a single iteration, so the
+        workers are used to expand the beam in parallel instead.
+
+        Parameters:
+            workers: Number of processes the beam is expanded in
+            seed: Seed of the random number generators
+            time_budget: Number of seconds the experiment may take, None for no limit
+        """
+        self.workers = max(self.workers, workers)
+        super().run_experiment(1, seed, time_budget)
+
     def run(self):
         """
         Execute the beam search folding process.
@@ -37,12 +86,37 @@ class Beam(Algorithm):
         """
         total_steps = len(self.protein.sequence) - 2
         self.progress_bar(0, total_steps)
-        for amino_acid in range(total_steps):
-            self.progress_bar(amino_acid, total_steps)
-            current_amino_acid = self.protein.sequence[amino_acid + 2]
-            self.step(current_amino_acid, amino_acid + 1)
+
+        if self.workers > 1:
+            self.pool = Pool(self.workers, initializer=init_worker, initargs=(self,))
+
+        try:
+            for amino_acid in range(self.first_step, total_steps):
+                self.progress_bar(amino_acid, total_steps)
+
+                self.hurry()
+                current_amino_acid = self.protein.sequence[amino_acid + 2]
+                self.step(current_amino_acid, amino_acid + 1)
+
+                self.current_step = amino_acid + 1
+                self.checkpoint()
+        finally:
+            if self.pool is not None:
+                self.pool.close()
+                self.pool = None
+            self.first_step = 0
+            self.current_step = None
 
         self.finish_up()
+
+        if self.duplicates:
+            print(f"\nDuplicate states merged: {sum(self.duplicates)} in total, at most {max(self.duplicates)} in one step")
+
+        if self.cache is not None and self.lookahead_depth > 0:
+            lookups = self.cache.hits + self.cache.misses
+            print(f"\nLookahead cache: {self.cache.hits} hits, {self.cache.misses} misses "
+                  f"({self.cache.hits / max(lookups, 1):.0%} hit rate)")
+
         return self.protein.calculate_score()
 
     def step(self, type: str, current_depth: int):
@@ -53,100 +127,467 @@ class Beam(Algorithm):
             amino_type: Type of amino acid being placed
             current_depth: Current position in the sequence (0-based index)
         """
-        # keep track of all possible next states
-        self.temporary_states = []
+        self.start_selection()
 
         # Generate all possible next states from current beam
-        for state in self.states:
-            legal_moves = self.check_legal_moves(state.amino_acids)
+        if self.pool is not None:
+            with self.phase("expand parallel"):
+                self.expand_parallel(type, current_depth)
+        else:
+            with self.phase("expand"):
+                for state in self.states:
+                    self.hurry()
+                    self.expand(state, type, current_depth)
+
+        # Turn the candidates that made it into the beam into states
+        with self.phase("select"):
+            self.prune_states(type)
+
+        if self.search_stats is not None:
+            self.search_stats.count("candidates", self.candidates)
+            self.search_stats.count("duplicates", self.duplicates[-1])
+            self.search_stats.end_step(amino_acid=current_depth + 1, beam=len(self.states), best=min(state.score for state in self.states))
+
+    def checkpoint_state(self):
+        """
+        Collect the state of the experiment for a checkpoint, including the beam while it is
+        being grown. The states are stored as fold arrays (see encode_state); the lookahead
+        cache is not stored and fills up again after resuming.
+
+        Returns:
+            dict: The state of the experiment, see Algorithm.checkpoint_state
+        """
+        state = super().checkpoint_state()
+        if self.current_step is not None:
+            state["beam"] = {
+                "step": self.current_step,
+                "states": [self.encode_state(beam_state) for beam_state in self.states],
+                "duplicates": array('i', self.duplicates),
+                "max size": self.max_size,
+                "lookahead depth": self.lookahead_depth
+            }
+        return state
+
+    def restore_state(self, state: dict):
+        """
+        Restore the state of the experiment from a checkpoint, see checkpoint_state.
+
+        Parameters:
+            state: The state that was written to the checkpoint
+        """
+        super().restore_state(state)
+        beam = state.get("beam")
+        if beam is not None:
+            self.states = [self.decode_state(folds) for folds in beam["states"]]
+            self.duplicates = list(beam["duplicates"])
+            self.max_size = beam["max size"]
+            self.lookahead_depth = beam["lookahead depth"]
+            self.first_step = beam["step"]
+
+    def hurry(self):
+        """
+        Finish the chain quickly, with a narrow beam without lookahead, once the deadline
+        of a time budget has passed (see Algorithm.run_iterations).
+        """
+        if (self.max_size > DEADLINE_WIDTH or self.lookahead_depth > 0) and self.out_of_time():
+            print(f"\nTime budget reached, finishing the fold with a beam of {DEADLINE_WIDTH} states")
+            self.max_size = min(self.max_size, DEADLINE_WIDTH)
+            self.lookahead_depth = 0
+            if self.pool is not None:
+                self.pool.close()
+                self.pool = None
+
+    def expand(self, state: FoldState, type: str, current_depth: int):
+        """
+        Evaluate every legal move from a state and add them to the candidate states.
+
+        Parameters:
+            state: Protein state to expand
+            type: Type of amino acid being placed
+            current_depth: Current position in sequence processing
+        """
+        if self.search_stats is not None:
+            self.search_stats.count("states expanded")
+
+        # the placed amino acids are collected once per state and shared by all its moves
+        occupied = state.occupied()
+        legal_moves = self.check_legal_moves(occupied, len(self.protein.sequence) - current_depth - 1)
+        legal_moves = self.canonical_moves(legal_moves, state.coordinate, state.symmetry)
+
+        if legal_moves:
+            free_slots = None
+            if self.heuristic:
+                free_slots = state.free_slots if state.free_slots is not None else self.count_free_slots(occupied)
+            for move in legal_moves:
+                self.evaluate_move(state, occupied, move, type, current_depth, free_slots)
+
+    def expand_parallel(self, type: str, current_depth: int):
+        """
+        Expand the beam in the process pool, split into one shard per worker.
+
+        The states are sent to the workers as fold arrays, and every worker sends back
+        its best candidates as (predicted score, index of the state, move, score), which
+        are selected from again here.
+
+        Parameters:
+            type: Type of amino acid being placed
+            current_depth: Current position in sequence processing
+        """
+        shard_size = -(-len(self.states) // self.workers)
+        tasks = [
+            (offset, [self.encode_state(state) for state in self.states[offset:offset + shard_size]], type, current_depth)
+            for offset in range(0, len(self.states), shard_size)
+        ]
+
+        # the shards are merged in order, so the result is the same as without workers
+        for candidates, duplicates in self.pool.map(expand_worker, tasks):
+            self.duplicates[-1] += duplicates
+            for predicted_score, index, move, score in candidates:
+                state = self.states[index]
+                symmetry = self.move_symmetry(state.symmetry, state.coordinate, move)
+                self.push_candidate(predicted_score, state, move, type, score, symmetry)
+
+    def expand_shard(self, offset: int, encoded_states: list, type: str, current_depth: int):
+        """
+        Expand a shard of the beam in a worker process and keep its best candidates.
+
+        Parameters:
+            offset: Index of the first state of the shard in the beam
+            encoded_states: Fold arrays of the states in the shard
+            type: Type of amino acid being placed
+            current_depth: Current position in sequence processing
+
+        Returns:
+            list: The best distinct (predicted score, index of the state, move, score) candidates
+            int: Number of candidates that were merged into a better equivalent state
+        """
+        self.start_selection()
+        origins = {}
+        for index, folds in enumerate(encoded_states, start=offset):
+            state = self.decode_state(folds)
+            origins[state] = index
+            self.expand(state, type, current_depth)
+
+        candidates = [
+            (predicted_score, origins[state], move, score)
+            for predicted_score, state, move, score, _, _ in self.selected_candidates()
+        ]
+        return candidates, self.duplicates[-1]
+
+    def encode_state(self, state: FoldState):
+        """
+        Encode a state compactly as the fold directions of its chain.
+
+        Parameters:
+            state: Protein state to encode
+
+        Returns:
+            array: Fold directions of the state
+        """
+        chain = state.chain()
+        return array('b', (
+            DIRECTION_FOLDS[(b.coordinate[0] - a.coordinate[0], b.coordinate[1] - a.coordinate[1], b.coordinate[2] - a.coordinate[2])]
+            for a, b in zip(chain, chain[1:])
+        ))
+
+    def decode_state(self, folds: array):
+        """
+        Rebuild a state, including its score and symmetry level, from its fold directions.
 
-            if legal_moves:
-                for move in legal_moves:
-                    self.evaluate_move(state, move, type, current_depth)
+        Parameters:
+            folds: Fold directions made by encode_state
+
+        Returns:
+            FoldState: The rebuilt state
+        """
+        state = FoldState.initial(self.protein.sequence)
+        occupied = state.occupied()
+
+        for index, fold in enumerate(folds[1:], start=2):
+            x, y, z = state.coordinate
+            dx, dy, dz = FOLD_DIRECTIONS[fold]
+            move = (x + dx, y + dy, z + dz)
+            type = self.protein.sequence[index]
 
-        # Prune states to maintain beam width
-        self.prune_states()
+            score = state.score + self.bond_score(occupied, move, index)
+            state = state.add(move, type, score, self.move_symmetry(state.symmetry, state.coordinate, move))
+            occupied[move] = index
 
-    def evaluate_move(self, state, move:tuple[int,int,int], type:str, current_depth:int):
+        return state
+
+    def evaluate_move(self, state: FoldState, occupied: dict, move:tuple[int,int,int], type:str, current_depth:int, free_slots: tuple = None):
         """
         Evaluate a potential move and add to candidate states.
 
+        With the heuristic, the predicted score is the score plus the contact bound of
+        Algorithm.contact_bound, which is updated for the move in constant time from the free
+        neighbours of the state, instead of the result of the lookahead simulation.
+
         Parameters:
             state: Current protein state being evaluated
-            position: (x, y, z) coordinates for potential placement
-            amino_type: Type of amino acid to place
+            occupied: Coordinates and positions in the chain of the amino acids placed in the state
+            move: (x, y, z) coordinates for potential placement
+            type: Type of amino acid to place
             current_depth: Current position in sequence processing
+            free_slots: Free neighbours of the H and C amino acids of the state, for the heuristic
         """
-        new_state = copy.deepcopy(state)
-        new_state.add_coordinate(move, type)
+        # the new amino acid is at position current_depth + 1 of the sequence
+        index = current_depth + 1
+        score = state.score + self.bond_score(occupied, move, index)
+        symmetry = self.move_symmetry(state.symmetry, state.coordinate, move)
 
-        # Calculate predicted score with lookahead simulation
-        predicted_score = self.simulate(new_state, self.lookahead_depth, current_depth)
-        self.temporary_states.append((new_state, predicted_score))
+        if self.heuristic:
+            taken, added = self.slot_changes(occupied, move, index)
+            if index % 2:
+                free_slots = (free_slots[0] - taken, free_slots[1] + added)
+            else:
+                free_slots = (free_slots[0] + added, free_slots[1] - taken)
+            predicted_score = score + self.heuristic_weight * self.contact_bound(current_depth + 2, free_slots)
+        else:
+            # Calculate predicted score with lookahead simulation
+            occupied[move] = index
+            predicted_score = self.simulate(occupied, score, symmetry, self.lookahead_depth, current_depth)
+            del occupied[move]
 
-    def simulate(self, state, depth: int, current_depth: int):
+        self.push_candidate(predicted_score, state, move, type, score, symmetry, free_slots)
+
+    def simulate(self, occupied: dict, score: int, symmetry: int, depth: int, current_depth: int):
         """
         Recursively simulate future moves to predict potential outcomes.
 
+        The moves are placed in and removed from the shared occupied dictionary,
+        so no copies of the state are made during the simulation. The points a position
+        can still gain are stored in the transposition table (see cache_key).
+
         Parameters:
-            state: Current protein state to simulate from
+            occupied: Coordinates and positions in the chain of the placed amino acids, in chain order
+            score: Score of the placed amino acids
+            symmetry: Symmetry level of the placed amino acids
             depth: Remaining lookahead steps
             current_depth: Current position in sequence processing
 
         Returns:
             float: Predicted score for this state path
         """
+        if self.search_stats is not None:
+            self.search_stats.count("lookahead nodes")
+
         # Base case: return current score when lookahead is exhausted
         if depth == 0:
-            return state.calculate_score()
+            return score
 
         # Early termination if at end of sequence (current_depth + 2 because we start at the 3rd amino_acid)
         if current_depth + 2 >= len(self.protein.sequence):
-            return state.calculate_score()
+            return score
 
-        # Check remaining amino acid types
-        remaining_acids = set(self.protein.sequence[current_depth + 2:])
+        # No additional points to score if none of the remaining amino acids can bond
+        if current_depth + 2 >= self.tail_start:
+            return score
 
-        # No additional points to score in this case
-        if remaining_acids == {'P'}:
-            return state.calculate_score()
+        # Reuse the result of an earlier simulation of the same position; shallow
+        # simulations are cheaper to repeat than to look up
+        key = None
+        if self.cache is not None and depth >= 2:
+            depth = min(depth, len(self.protein.sequence) - current_depth - 2)
+            key = self.cache_key(occupied, symmetry, depth, current_depth)
+            gain = self.cache.get(key, depth)
+            if self.search_stats is not None:
+                self.search_stats.count("cache hits" if gain is not None else "cache misses")
+            if gain is not None:
+                return score + gain
 
-        # Generate legal moves for the current state
-        legal_moves = self.check_legal_moves(state.amino_acids)
+        # Generate legal moves for the current state; the dead end check looks beyond the
+        # window of cache_key, so it is only used in the lookahead without the cache
+        last = next(reversed(occupied))
+        remaining = len(self.protein.sequence) - current_depth - 2 if self.cache is None else None
+        legal_moves = self.check_legal_moves(occupied, remaining)
+        legal_moves = self.canonical_moves(legal_moves, last, symmetry)
 
         # If no legal moves exist, return a large penalty (previously it returned 0, which might mislead selection)
         if not legal_moves:
+            if key is not None:
+                self.cache.put(key, depth, float("inf"))
             return float("inf")
 
         # Simulate each move and repeat calculating scores
         scores = []
-        next_amino_type = self.protein.sequence[current_depth + 2]
+        index = current_depth + 2
         for move in legal_moves:
-            simulated_state = copy.deepcopy(state)
-            simulated_state.add_coordinate(move, next_amino_type) 
-            scores.append(self.simulate(simulated_state, depth - 1, current_depth + 1))
+            simulated_score = score + self.bond_score(occupied, move, index)
+            simulated_symmetry = self.move_symmetry(symmetry, last, move)
+            occupied[move] = index
+            scores.append(self.simulate(occupied, simulated_score, simulated_symmetry, depth - 1, current_depth + 1))
+            del occupied[move]
+
+        best_score = min(scores)
+        if key is not None:
+            self.cache.put(key, depth, best_score - score)
+
+        return best_score
+
+    def cache_key(self, occupied: dict, symmetry: int, depth: int, current_depth: int):
+        """
+        Describe a lookahead position canonically for the transposition table.
+
+        A simulation of `depth` moves only places amino acids within `depth` steps of the
+        end of the chain and only looks at their neighbours. The cells within `depth + 1`
+        steps of the end, taken relative to the end, together with the types of the next
+        `depth` amino acids and the symmetry level therefore fully determine the points the
+        position can still gain, no matter where on the lattice or along which path the chain
+        got there, and no matter where in the sequence: repeats in the sequence share their entries.
+        Only the start of the tail of amino acids that cannot bond, where the simulation stops
+        early, is kept when it falls within the window.
+
+        Parameters:
+            occupied: Coordinates and positions in the chain of the placed amino acids, in chain order
+            symmetry: Symmetry level of the placed amino acids
+            depth: Remaining lookahead steps
+            current_depth: Current position in sequence processing
 
-        return min(scores)
+        Returns:
+            tuple: Hashable key of the position
+        """
+        end_x, end_y, end_z = next(reversed(occupied))
+        radius = depth + 1
+        codes = self.codes
+        window = frozenset(
+            (x - end_x, y - end_y, z - end_z, codes[index])
+            for (x, y, z), index in occupied.items()
+            if abs(x - end_x) + abs(y - end_y) + abs(z - end_z) <= radius
+        )
+        start = current_depth + 2
+        suffix = codes[start:start + depth]
+        return (window, suffix, min(self.tail_start - start, depth), symmetry)
 
-    def prune_states(self):
+    def bond_score(self, occupied: dict, move: tuple[int, int, int], index: int):
+        """
+        Calculate the points gained by placing an amino acid after the last placed one.
+
+        Parameters:
+            occupied: Coordinates and positions in the chain of the placed amino acids
+            move: (x, y, z) coordinates of the new amino acid
+            index: Position in the chain of the new amino acid
+
+        Returns:
+            int: Sum of the points of all bonds the new amino acid forms
         """
-        Select top candidate states to maintain beam width.
+        if self.search_stats is not None:
+            self.search_stats.count("score evaluations")
+
+        # amino acids that cannot bond with any other are skipped, see pair_tables
+        if not self.bonding[index]:
+            return 0
+        return sum(points for _, _, points in Protein.bonds(occupied, move, self.pair_weights[index], self.directions))
+
+    def start_selection(self):
+        """
+        Start selecting the candidates of a new step, see push_candidate.
+        """
+        # the best candidates so far, as a heap with the worst one on top
+        self.heap = []
+
+        # the heap entry of every candidate key, see push_candidate
+        self.heap_entries = {}
+
+        # number of candidates seen in this step, which orders candidates with the same predicted score
+        self.candidates = 0
+
+        self.duplicates.append(0)
+
+    def push_candidate(self, predicted_score: float, state: FoldState, move: tuple[int, int, int], type: str, score: int, symmetry: int,
+                       free_slots: tuple = None):
         """
-        if not self.temporary_states:
+        Offer a candidate to the beam of the next step.
+
+        The candidates are streamed into a heap of at most max_size entries, with the worst
+        candidate on top, so a candidate that is not better than all of a full beam is dropped
+        right away and no state is created for it; the states are only created for the
+        candidates that are left at the end of the step (see prune_states). Candidates with
+        the same predicted score are kept in the order they were offered.
+
+        Different parents often grow into the same amino acids at the same coordinates with
+        the same end of the chain, or into mirror images of each other. These states can
+        gain the same points from here on, so only the best of them is kept (see FoldState.key)
+        and the beam holds max_size distinct states instead. A worse copy that is already in
+        the heap is marked as removed and skipped when it reaches the top.
+
+        Parameters:
+            predicted_score: Predicted score of the candidate
+            state: State the candidate is grown from
+            move: (x, y, z) coordinates of the new amino acid
+            type: Type of the new amino acid
+            score: Score of the candidate
+            symmetry: Symmetry level of the candidate
+            free_slots: Free neighbours of the H and C amino acids of the candidate, for the heuristic
+        """
+        order = self.candidates
+        self.candidates += 1
+
+        if len(self.heap_entries) == self.max_size:
+            self.skip_removed()
+            if predicted_score >= -self.heap[0][0]:
+                return
+
+        key = state.child_key(move, type)
+        entry = self.heap_entries.get(key)
+        if entry is not None:
+            self.duplicates[-1] += 1
+            if predicted_score >= -entry[0]:
+                return
+            entry[2] = None
+
+        entry = [-predicted_score, -order, key, state, move, score, symmetry, free_slots]
+        self.heap_entries[key] = entry
+        heapq.heappush(self.heap, entry)
+
+        if len(self.heap_entries) > self.max_size:
+            self.skip_removed()
+            worst = heapq.heappop(self.heap)
+            del self.heap_entries[worst[2]]
+
+    def skip_removed(self):
+        """
+        Pop the removed entries off the top of the heap, so the worst candidate is on top.
+        """
+        while self.heap[0][2] is None:
+            heapq.heappop(self.heap)
+
+    def selected_candidates(self):
+        """
+        Collect the candidates left in the heap.
+
+        Returns:
+            list: (predicted score, state, move, score, symmetry, free slots) of the candidates, best first
+        """
+        entries = sorted((entry for entry in self.heap if entry[2] is not None), reverse=True)
+        return [(-entry[0], entry[3], entry[4], entry[5], entry[6], entry[7]) for entry in entries]
+
+    def prune_states(self, type: str):
+        """
+        Turn the candidates left in the heap into the states of the beam.
+
+        Parameters:
+            type: Type of amino acid that was placed
+        """
+        if not self.heap:
             return
 
-        # Sort states by ascending score (lower is better)
-        self.temporary_states.sort(key=lambda x: x[1])
+        if self.search_stats is not None:
+            self.search_stats.count("copies made", len(self.heap_entries))
 
-        # Select top N states within beam width
-        keep_count = min(self.max_size, len(self.temporary_states))
-        self.states = [self.temporary_states[i][0] for i in range(keep_count)]
+        self.states = [
+            state.add(move, type, score, symmetry, free_slots)
+            for _, state, move, score, symmetry, free_slots in self.selected_candidates()
+        ]
 
     def finish_up(self):
         """
         Finalize best state and save results.
+
+        Only the best state is turned into a full Protein.
         """
-        self.protein = min(self.states, key=lambda x: x.calculate_score())
+        best_state = min(self.states, key=lambda x: x.score)
+        self.protein = best_state.to_protein(self.protein.sequence, self.protein.output_file, self.protein.threeD, self.interactions)
         super().finish_up()
 
     def progress_bar(self, progress, total):
@@ -160,3 +601,28 @@ class Beam(Algorithm):
         percent = 100 * (progress / float(total))
         bar = chr(9608) * int(percent) + '-'* (100 - int(percent))
         print(f"\r|{bar}| {percent: .2f}%", end="")
+
+# Beam of the worker process, set once when the process pool starts
+worker_beam = None
+
+def init_worker(beam: Beam):
+    """
+    Store a copy of the beam in a worker process, including its settings and lookahead cache.
+
+    Parameters:
+        beam: The beam search that starts the process pool
+    """
+    global worker_beam
+    worker_beam = beam
+
+def expand_worker(task: tuple):
+    """
+    Expand a shard of the beam in a worker process, see Beam.expand_shard.
+
+    Parameters:
+        task: (offset, encoded states, type, current depth)
+
+    Returns:
+        tuple: The best candidates of the shard and the number of merged candidates
+    """
+    return worker_beam.expand_shard(*task)
@@ -0,0 +1,144 @@
+from .algorithm_class import Algorithm
+from .beam import Beam
+from classes.protein_class import INTERACTIONS, Protein
+
+class BranchAndBound(Algorithm):
+    """
+    Exact depth-first search algorithm for protein folding prediction.
+
+    Grows the chain one amino acid at a time and abandons every branch whose score plus
+    an optimistic bound on the points the remaining amino acids can still gain cannot
+    beat the best fold found so far. The fold that is returned is a proven optimum.
+
+    The search starts from the fold of a quick beam search, so the bound prunes from the
+    first node on; the search then only has to prove that no better fold exists. The running
+    time still grows exponentially with the length of the chain, so this is an exact solver
+    for short chains only, and how long the proof takes depends strongly on the sequence:
+    in 2D, S1-20 and S3-25 are proven in about 1 and 5 seconds, but S2-24 still visits over
+    two million nodes after the beam search found its optimum and takes 15 to 30 seconds,
+    and S4-36 is not proven within two minutes. In 3D a 14-mer takes about 10 seconds and a
+    20-mer does not finish in minutes. For longer chains use a time budget, which returns
+    the best fold found so far.
+    """
+    def __init__(self, sequence: str, output_file: str, threeD: bool, beam_size: int = 100, interactions: tuple = INTERACTIONS):
+        """
+        Initialize the Branch and Bound algorithm.
+
+        Parameters:
+            sequence: Amino acid sequence of the protein
+            output_file: Path to save output files
+            threeD: True for 3D folding, False for 2D
+            beam_size: Beam width of the search for the first fold, 0 to start without one
+            interactions: Points of a bond between two amino acid types, see INTERACTIONS
+        """
+        super().__init__(sequence, 1, output_file, threeD, interactions)
+        self.protein = Protein(sequence, output_file, threeD, interactions)
+        self.beam_size = beam_size
+
+        # the bound already cuts the branches that run into a dead end; checking for them costs more than it saves
+        self.dead_end_pruning = False
+        self.slot_counts = self.calculate_slot_counts()
+
+    def run(self):
+        """
+        Execute the depth-first search.
+
+        Returns:
+            int: Score of the optimal protein configuration
+        """
+        self.nodes = 0
+        self.best_fold_score = float("inf")
+        self.best_coordinates = None
+        self.stopped = False
+
+        # the fold of a beam search is the first one to beat, only better folds are searched for
+        if self.beam_size > 0:
+            beam = Beam(self.sequence, self.beam_size, self.output_file, self.threeD, interactions=self.interactions)
+            beam.random = self.random
+            beam.run()
+            print()
+            self.best_fold_score = beam.protein.calculate_score()
+            self.best_coordinates = list(beam.protein.amino_acids)
+            self.record_score(self.best_fold_score)
+
+        # free neighbours of the placed H and C amino acids, split by the parity of their position
+        occupied = dict(self.protein.positions)
+        self.free_slots = self.count_free_slots(occupied)
+        self.search(occupied, 0, 0, 2)
+
+        # build the protein of the best fold that was found
+        self.protein = Protein(self.sequence, self.output_file, self.threeD, self.interactions)
+        for index, coordinate in enumerate(self.best_coordinates[2:], start=2):
+            self.protein.add_coordinate(coordinate, self.sequence[index])
+
+        if self.stopped:
+            print(f"Time budget reached after visiting {self.nodes} nodes; the fold is the best one found, but may not be optimal.")
+        else:
+            print(f"Optimal fold found after visiting {self.nodes} nodes.")
+        self.finish_up()
+        return self.protein.calculate_score()
+
+    def search(self, occupied: dict, score: int, symmetry: int, index: int):
+        """
+        Recursively place the amino acid at `index` on every legal position.
+
+        Parameters:
+            occupied: Coordinates and positions in the chain of the placed amino acids, in chain order
+            score: Score of the placed amino acids
+            symmetry: Symmetry level of the placed amino acids
+            index: Position in the sequence of the next amino acid to place
+        """
+        self.nodes += 1
+        if self.search_stats is not None:
+            self.search_stats.count("states expanded")
+
+        # at the deadline of a time budget the search is stopped once a fold has been found
+        if self.stopped:
+            return
+        if self.nodes % 1024 == 0 and self.best_coordinates is not None and self.out_of_time():
+            self.stopped = True
+            return
+
+        # a complete fold; it is only reached if it beats the best fold so far
+        if index == len(self.sequence):
+            if score < self.best_fold_score:
+                self.best_fold_score = score
+                self.best_coordinates = list(occupied)
+                self.record_score(score)
+            return
+
+        # prune branches that cannot beat the best fold, even in the best case
+        if score + self.contact_bound(index, self.free_slots) >= self.best_fold_score:
+            return
+
+        # moves into pockets that cannot hold the rest of the chain are skipped
+        previous = next(reversed(occupied))
+        legal_moves = self.check_legal_moves(occupied, len(self.sequence) - index)
+        legal_moves = self.canonical_moves(legal_moves, previous, symmetry)
+
+        if not legal_moves:
+            return
+
+        if self.search_stats is not None:
+            self.search_stats.count("score evaluations", len(legal_moves))
+
+        # try the moves that score the most points first, so good folds are found early
+        weights = self.pair_weights[index]
+        moves = sorted(
+            (sum(points for _, _, points in Protein.bonds(occupied, move, weights, self.directions)), move)
+            for move in legal_moves
+        )
+
+        parity = index % 2
+        for points, move in moves:
+            taken, added = self.slot_changes(occupied, move, index)
+
+            self.free_slots[1 - parity] -= taken
+            self.free_slots[parity] += added
+            occupied[move] = index
+
+            self.search(occupied, score + points, self.move_symmetry(symmetry, previous, move), index + 1)
+
+            del occupied[move]
+            self.free_slots[parity] -= added
+            self.free_slots[1 - parity] += taken
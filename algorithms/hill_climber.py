@@ -0,0 +1,309 @@
+import math
+from .algorithm_class import Algorithm
+from .random_folding import RandomFolding
+from .beam import Beam
+from classes.protein_class import INTERACTIONS, Protein
+
+class HillClimber(Algorithm):
+    """
+    Local search algorithm for protein folding prediction.
+
+    Starts from a fold found by RandomFolding or Beam and repeatedly changes it with pull
+    moves and crankshaft moves. A change is accepted if it does not lower the stability,
+    or, during simulated annealing, with a probability that drops with the temperature.
+    The change in score is calculated from the amino acids that moved only.
+    """
+    def __init__(self, sequence: str, iterations: int, output_file: str, threeD: bool, start: str = "random",
+                 schedule: str = "constant", temperature: float = 0.0, final_temperature: float = 0.01, beam_size: int = 10,
+                 interactions: tuple = INTERACTIONS):
+        """
+        Initialize the Hill Climber algorithm.
+
+        Parameters:
+            sequence: Amino acid sequence of the protein
+            iterations: Number of moves to try
+            output_file: Path to save output files
+            threeD: True for 3D folding, False for 2D
+            start: 'random' for a fold grown at random by RandomFolding, or 'beam' for a Beam fold
+            schedule: Annealing schedule, 'constant', 'linear', 'exponential' or 'logarithmic'
+            temperature: Temperature at the first move; 0 only accepts changes that do not lower the stability
+            final_temperature: Temperature at the last move, for the linear and exponential schedules
+            beam_size: Beam width when starting from a Beam fold
+            interactions: Points of a bond between two amino acid types, see INTERACTIONS
+        """
+        super().__init__(sequence, 1, output_file, threeD, interactions)
+        self.protein = Protein(sequence, output_file, threeD, interactions)
+        self.steps = iterations
+        self.start = start
+        self.schedule = schedule
+        self.temperature = temperature
+        self.final_temperature = final_temperature
+        self.beam_size = beam_size
+
+    def run(self):
+        """
+        Execute the local search.
+
+        Returns:
+            int: Score of the best fold found
+        """
+        self.load_coordinates(self.starting_fold())
+        self.best_fold_score = self.energy
+        best_coordinates = list(self.coordinates)
+
+        self.progress_bar(0, self.steps)
+        for step in range(self.steps):
+            self.try_move(self.current_temperature(step))
+
+            if self.energy < self.best_fold_score:
+                self.best_fold_score = self.energy
+                best_coordinates = list(self.coordinates)
+                self.record_score(self.energy)
+
+            if (step + 1) % 1000 == 0 or step + 1 == self.steps:
+                self.progress_bar(step + 1, self.steps)
+
+                # stop at the deadline of a time budget
+                if self.out_of_time():
+                    break
+
+        self.protein = self.calculate_protein(self.coordinates_to_folds(best_coordinates))
+        self.finish_up()
+        return self.protein.calculate_score()
+
+    def starting_fold(self):
+        """
+        Fold the protein with RandomFolding or Beam, to start the local search from.
+
+        Returns:
+            list[tuple[int, int, int]]: The coordinates of the amino acids
+        """
+        if self.start == "beam":
+            algorithm = Beam(self.sequence, self.beam_size, self.output_file, self.threeD, interactions=self.interactions)
+        else:
+            # growth mode never throws a fold away, rejection sampling needs thousands of attempts on long chains
+            algorithm = RandomFolding(self.sequence, 1, self.output_file, self.threeD, mode="growth", interactions=self.interactions)
+        algorithm.random = self.random
+
+        # the start keeps to the time budget too, but without a fold there is nothing to stop with,
+        # so a random fold that was cut off at the deadline is finished without it
+        algorithm.start_time, algorithm.deadline = self.start_time, self.deadline
+        if algorithm.run() is None:
+            algorithm.deadline = None
+            algorithm.run()
+        print()
+        return list(algorithm.protein.amino_acids)
+
+    def load_coordinates(self, coordinates: list[tuple[int, int, int]]):
+        """
+        Set the current fold of the local search.
+
+        Parameters:
+            coordinates: The coordinates of the amino acids, in chain order
+        """
+        self.coordinates = list(coordinates)
+        self.positions = {coordinate: index for index, coordinate in enumerate(self.coordinates)}
+        self.energy = self.contact_energy(range(len(self.coordinates)))
+
+    def current_temperature(self, step: int):
+        """
+        Calculate the temperature of the annealing schedule at a step.
+
+        Parameters:
+            step: Number of the current move
+
+        Returns:
+            float: The temperature
+        """
+        progress = step / max(self.steps - 1, 1)
+        if self.schedule == "linear":
+            return self.temperature + (self.final_temperature - self.temperature) * progress
+        if self.schedule == "exponential" and self.temperature > 0:
+            return self.temperature * (self.final_temperature / self.temperature) ** progress
+        if self.schedule == "logarithmic":
+            return self.temperature / math.log(math.e + step)
+        return self.temperature
+
+    def try_move(self, temperature: float):
+        """
+        Make a random pull or crankshaft move and keep it following the Metropolis criterion.
+
+        Parameters:
+            temperature: Current temperature; 0 only accepts moves that do not lower the stability
+
+        Returns:
+            bool: True if the fold was changed
+        """
+        index = self.random.randrange(len(self.coordinates))
+        kind = self.random.randrange(3)
+        if kind == 0:
+            new_coordinates = self.pull_move(index, 1)
+        elif kind == 1:
+            new_coordinates = self.pull_move(index, -1)
+        else:
+            new_coordinates = self.crankshaft_move(index)
+
+        if self.search_stats is not None:
+            self.search_stats.count("moves tried")
+
+        if not new_coordinates:
+            return False
+
+        moved = new_coordinates.keys()
+        old_coordinates = {index: self.coordinates[index] for index in moved}
+
+        energy_before = self.contact_energy(moved)
+        self.place(new_coordinates, old_coordinates)
+        delta = self.contact_energy(moved) - energy_before
+
+        if delta <= 0 or (temperature > 0 and self.random.random() < math.exp(-delta / temperature)):
+            self.energy += delta
+            if self.search_stats is not None:
+                self.search_stats.count("moves accepted")
+            return True
+
+        self.place(old_coordinates, new_coordinates)
+        return False
+
+    def place(self, new_coordinates: dict, old_coordinates: dict):
+        """
+        Move amino acids to new coordinates.
+
+        Parameters:
+            new_coordinates: {index: coordinate} of the amino acids after the move
+            old_coordinates: {index: coordinate} of the same amino acids before the move
+        """
+        for coordinate in old_coordinates.values():
+            del self.positions[coordinate]
+        for index, coordinate in new_coordinates.items():
+            self.positions[coordinate] = index
+            self.coordinates[index] = coordinate
+
+    def contact_energy(self, indices):
+        """
+        Calculate the points of all bonds that involve at least one of the given amino acids.
+
+        Parameters:
+            indices: Positions in the sequence of the amino acids
+
+        Returns:
+            int: The sum of the points of the bonds
+        """
+        if self.search_stats is not None:
+            self.search_stats.count("score evaluations")
+
+        indices = set(indices)
+        positions = self.positions
+        energy = 0
+        for index in indices:
+            # amino acids that cannot bond with any other are skipped, see pair_tables
+            if not self.bonding[index]:
+                continue
+
+            weights = self.pair_weights[index]
+            x, y, z = self.coordinates[index]
+            for dx, dy, dz in self.directions:
+                partner = positions.get((x + dx, y + dy, z + dz))
+
+                # bonds between two moved amino acids are counted once
+                if partner is None or (partner in indices and partner < index):
+                    continue
+
+                # the weight is 0 for connected amino acids and pairs that do not bond
+                energy += weights[partner]
+
+        return energy
+
+    def pull_move(self, index: int, direction: int):
+        """
+        Find a pull move of an amino acid towards one of the ends of the chain.
+
+        The amino acid moves to a free position L next to its neighbour `index + direction`
+        and diagonal to where it was. The amino acid on the other side moves to the free
+        corner C that completes the square, and the rest of the chain follows, each amino
+        acid taking the place two positions up the chain, until the chain is connected again.
+        At the end of the chain this is an end move, and if C is already occupied by the
+        amino acid on the other side it is a corner move.
+
+        Parameters:
+            index: Position in the sequence of the amino acid to move
+            direction: 1 to move towards the neighbour after it, -1 for the one before it
+
+        Returns:
+            dict or None: {index: coordinate} of the amino acids that move, None if the move is not possible
+        """
+        length = len(self.coordinates)
+        anchor = index + direction
+        if not 0 <= anchor < length:
+            return None
+
+        x, y, z = self.coordinates[index]
+        ax, ay, az = self.coordinates[anchor]
+        perpendicular = [
+            (dx, dy, dz) for dx, dy, dz in self.directions
+            if dx * (ax - x) + dy * (ay - y) + dz * (az - z) == 0
+        ]
+        dx, dy, dz = self.random.choice(perpendicular)
+
+        free_position = (ax + dx, ay + dy, az + dz)
+        corner = (x + dx, y + dy, z + dz)
+        if free_position in self.positions:
+            return None
+
+        new_coordinates = {index: free_position}
+        follower = index - direction
+        if not 0 <= follower < length or self.coordinates[follower] == corner:
+            return new_coordinates
+        if corner in self.positions:
+            return None
+
+        new_coordinates[follower] = corner
+        follower -= direction
+        while 0 <= follower < length and not self.adjacent(self.coordinates[follower], new_coordinates[follower + direction]):
+            new_coordinates[follower] = self.coordinates[follower + 2 * direction]
+            follower -= direction
+
+        return new_coordinates
+
+    def crankshaft_move(self, index: int):
+        """
+        Find a crankshaft move: rotate the U-shaped pair of amino acids index and index + 1
+        around the axis through their neighbours index - 1 and index + 2.
+
+        Parameters:
+            index: Position in the sequence of the first amino acid of the pair
+
+        Returns:
+            dict or None: {index: coordinate} of the two amino acids, None if the move is not possible
+        """
+        if index < 1 or index + 2 >= len(self.coordinates):
+            return None
+
+        before, first, second, after = self.coordinates[index - 1:index + 3]
+        if not self.adjacent(before, after):
+            return None
+
+        # the pair sticks out from the axis in the same direction
+        dx, dy, dz = (first[0] - before[0], first[1] - before[1], first[2] - before[2])
+        axis = (after[0] - before[0], after[1] - before[1], after[2] - before[2])
+        rotations = [
+            (rx, ry, rz) for rx, ry, rz in self.directions
+            if rx * axis[0] + ry * axis[1] + rz * axis[2] == 0 and (rx, ry, rz) != (dx, dy, dz)
+        ]
+        rx, ry, rz = self.random.choice(rotations)
+
+        new_first = (before[0] + rx, before[1] + ry, before[2] + rz)
+        new_second = (after[0] + rx, after[1] + ry, after[2] + rz)
+        if new_first in self.positions or new_second in self.positions:
+            return None
+
+        return {index: new_first, index + 1: new_second}
+
+    def adjacent(self, coordinate1: tuple[int, int, int], coordinate2: tuple[int, int, int]):
+        """
+        Determine if two coordinates are neighbours on the lattice.
+
+        Returns:
+            bool: True if the coordinates are one step apart
+        """
+        return abs(coordinate1[0] - coordinate2[0]) + abs(coordinate1[1] - coordinate2[1]) + abs(coordinate1[2] - coordinate2[2]) == 1
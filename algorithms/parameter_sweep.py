@@ -0,0 +1,152 @@
+import contextlib
+import hashlib
+import io
+import itertools
+import json
+import os
+import time
+from multiprocessing import Pool
+
+class ParameterSweep():
+    """
+    Runs an algorithm for every combination of a grid of parameters and a list of sequences.
+
+    The cells of the grid are run in parallel in a process pool, and the result of every
+    cell is stored on disk in its own file, named after a hash of the algorithm, the
+    sequence, the dimension, the seed and the parameters of the cell. Running the sweep
+    again, or with a larger grid, only runs the cells that are not stored yet.
+    """
+    def __init__(self, algorithm, grid: dict, sequences: list[str], threeD: bool, fixed: dict = None,
+                 seed: int = 0, cache_directory: str = "sweeps", workers: int = None, cost=None):
+        """
+        Initializes the sweep.
+
+        Parameters:
+            algorithm (type): The algorithm class, created as algorithm(sequence=..., output_file=None, threeD=..., **parameters).
+            grid (dict): The values to try of every parameter, as {name: [values]}.
+            sequences (list[str]): The sequences to run every combination of parameters on.
+            threeD (bool): Indicates if the proteins are folded in 3D.
+            fixed (dict): Parameters that are the same in every cell.
+            seed (int): The seed of the random number generators of every cell.
+            cache_directory (str): The directory the results of the cells are stored in.
+            workers (int): The number of processes, the number of CPUs by default.
+            cost: A function that estimates the running time of a cell from its parameters. The
+                  most expensive cells are started first, so the slowest cell does not start last.
+        """
+        self.algorithm = algorithm
+        self.grid = grid
+        self.sequences = sequences
+        self.threeD = threeD
+        self.fixed = fixed or {}
+        self.seed = seed
+        self.cache_directory = cache_directory
+        self.workers = workers
+        self.cost = cost
+
+    def cells(self):
+        """
+        Lists the cells of the sweep, in the order of the sequences and then the grid.
+
+        Returns:
+            list[dict]: The description of every cell, which is also its cache key.
+        """
+        names = list(self.grid)
+        return [
+            {
+                "algorithm": self.algorithm.__name__,
+                "sequence": sequence,
+                "threeD": self.threeD,
+                "seed": self.seed,
+                "parameters": {**self.fixed, **dict(zip(names, values))}
+            }
+            for sequence in self.sequences
+            for values in itertools.product(*(self.grid[name] for name in names))
+        ]
+
+    def cache_file(self, cell: dict):
+        """
+        Gives the file the result of a cell is stored in.
+
+        Parameters:
+            cell (dict): The description of the cell, see cells.
+
+        Returns:
+            str: The path of the file.
+        """
+        key = json.dumps(cell, sort_keys=True)
+        return os.path.join(self.cache_directory, hashlib.sha1(key.encode()).hexdigest() + ".json")
+
+    def run(self):
+        """
+        Runs the cells that are not stored yet and collects the results of all cells.
+
+        Every result is stored as soon as its cell finishes, so an interrupted sweep keeps
+        the cells it completed.
+
+        Returns:
+            list[dict]: The cells with their results (score, folds and seconds), in the order of cells.
+        """
+        os.makedirs(self.cache_directory, exist_ok=True)
+
+        cells = self.cells()
+        results = {}
+        missing = []
+        for index, cell in enumerate(cells):
+            cache_file = self.cache_file(cell)
+            if os.path.exists(cache_file):
+                with open(cache_file, 'r') as file:
+                    results[index] = json.load(file)
+            else:
+                missing.append(index)
+
+        print(f"{len(cells) - len(missing)} of {len(cells)} cells are cached, running {len(missing)}.")
+
+        if self.cost is not None:
+            missing.sort(key=lambda index: self.cost(cells[index]["parameters"]), reverse=True)
+
+        tasks = [(index, self.algorithm, cells[index]) for index in missing]
+        with Pool(self.workers) if len(tasks) > 1 and self.workers != 1 else contextlib.nullcontext() as pool:
+            finished = pool.imap_unordered(run_cell, tasks) if pool is not None else map(run_cell, tasks)
+            for index, result in finished:
+                results[index] = result
+                self.store(result)
+                print(f"{result['parameters']} on {result['sequence']}: score {result['score']} in {result['seconds']:.2f} s")
+
+        return [results[index] for index in range(len(cells))]
+
+    def store(self, result: dict):
+        """
+        Stores the result of a cell, through a temporary file so a stored result is always complete.
+
+        Parameters:
+            result (dict): The cell with its result, see run_cell.
+        """
+        cell = {key: result[key] for key in ("algorithm", "sequence", "threeD", "seed", "parameters")}
+        cache_file = self.cache_file(cell)
+        with open(cache_file + ".tmp", 'w') as file:
+            json.dump(result, file)
+        os.replace(cache_file + ".tmp", cache_file)
+
+def run_cell(task: tuple):
+    """
+    Runs the algorithm of one cell, without output files, plots or printing.
+
+    Parameters:
+        task (tuple): (index of the cell, algorithm class, description of the cell)
+
+    Returns:
+        tuple: The index of the cell and the cell with its score, folds and seconds.
+    """
+    index, algorithm, cell = task
+    start_time = time.perf_counter()
+
+    engine = algorithm(sequence=cell["sequence"], output_file=None, threeD=cell["threeD"], **cell["parameters"])
+    engine.plot = False
+    with contextlib.redirect_stdout(io.StringIO()):
+        engine.run_iterations(1, cell["seed"])
+
+    result = dict(cell)
+    result["score"] = engine.best_score
+    result["folds"] = list(engine.best_protein.folds) if engine.best_protein is not None else None
+    result["seconds"] = time.perf_counter() - start_time
+    return index, result
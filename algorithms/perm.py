@@ -0,0 +1,190 @@
+import math
+import time
+from .algorithm_class import Algorithm
+from classes.protein_class import INTERACTIONS, Protein
+
+class PERM(Algorithm):
+    """
+    Pruned-enriched Rosenbluth method (PERM) for protein folding prediction.
+
+    Grows chains one amino acid at a time on the legal moves, choosing every move with a
+    probability following its Boltzmann factor and keeping a Rosenbluth weight that corrects
+    for this choice. Partial chains with a high weight compared to the average weight at
+    their length are cloned, and chains with a low weight are pruned half of the time, which
+    keeps the cost per valid fold from growing exponentially with the length of the chain.
+    """
+    def __init__(self, sequence: str, iterations: int, output_file: str, threeD: bool, temperature: float = 0.3,
+                 max_clones: int = 2, max_population: int = 10000, upper_threshold: float = 3.0, lower_threshold: float = 0.3,
+                 interactions: tuple = INTERACTIONS):
+        """
+        Initialize the PERM algorithm.
+
+        Parameters:
+            sequence: Amino acid sequence of the protein
+            iterations: Number of tours, every tour grows one chain and its clones
+            output_file: Path to save output files
+            threeD: True for 3D folding, False for 2D
+            temperature: Temperature of the Boltzmann factors
+            max_clones: Number of copies a chain is split into when it is cloned
+            max_population: Maximum number of chains grown in one tour, cloning stops at this limit
+            upper_threshold: Chains with a weight above this times the average weight at their length are cloned
+            lower_threshold: Chains with a weight below this times the average weight at their length may be pruned
+            interactions: Points of a bond between two amino acid types, see INTERACTIONS
+        """
+        super().__init__(sequence, 1, output_file, threeD, interactions)
+        self.protein = Protein(sequence, output_file, threeD, interactions)
+        self.tours = iterations
+        self.temperature = temperature
+        self.max_clones = max_clones
+        self.max_population = max_population
+        self.log_upper_threshold = math.log(upper_threshold)
+        self.log_lower_threshold = math.log(lower_threshold)
+
+        # logarithm of the sum of the weights of all chains that reached every length
+        self.log_weight_sums = [-math.inf] * (len(sequence) + 1)
+
+        self.stats = {
+            "tours": 0,
+            "chains": 0,
+            "valid folds": 0,
+            "clones": 0,
+            "prunes": 0,
+            "dead ends": 0,
+            "nodes": 0,
+            "seconds": 0.0
+        }
+
+    def run(self):
+        """
+        Execute all tours of the PERM algorithm.
+
+        Returns:
+            int: Score of the best fold found
+        """
+        start_time = time.time()
+        self.best_fold_score = math.inf
+        self.best_coordinates = None
+
+        self.progress_bar(0, self.tours)
+        tour = 0
+        while tour < self.tours or self.best_coordinates is None:
+            # stop between tours at the deadline of a time budget, once a fold has been found
+            if self.best_coordinates is not None and self.out_of_time():
+                break
+
+            self.stats["tours"] += 1
+            self.population = 1
+            self.stats["chains"] += 1
+
+            occupied = dict(self.protein.positions)
+            self.grow(occupied, 0, 0, 2, 0.0)
+
+            tour += 1
+            self.progress_bar(min(tour, self.tours), self.tours)
+
+        self.stats["seconds"] += time.time() - start_time
+        self.report()
+
+        self.protein = Protein(self.sequence, self.output_file, self.threeD, self.interactions)
+        for index, coordinate in enumerate(self.best_coordinates[2:], start=2):
+            self.protein.add_coordinate(coordinate, self.sequence[index])
+
+        self.finish_up()
+        return self.protein.calculate_score()
+
+    def grow(self, occupied: dict, score: int, symmetry: int, index: int, log_weight: float):
+        """
+        Recursively grow a chain by placing the amino acid at `index`.
+
+        Parameters:
+            occupied: Coordinates and positions in the chain of the placed amino acids, in chain order
+            score: Score of the placed amino acids
+            symmetry: Symmetry level of the placed amino acids
+            index: Position in the sequence of the next amino acid to place
+            log_weight: Logarithm of the Rosenbluth weight of the chain
+        """
+        self.stats["nodes"] += 1
+        if self.search_stats is not None:
+            self.search_stats.count("states expanded")
+        self.log_weight_sums[index] = log_add(self.log_weight_sums[index], log_weight)
+
+        # a complete fold
+        if index == len(self.sequence):
+            self.stats["valid folds"] += 1
+            if score < self.best_fold_score:
+                self.best_fold_score = score
+                self.best_coordinates = list(occupied)
+                self.record_score(score)
+            return
+
+        # moves into pockets that cannot hold the rest of the chain are skipped
+        last = next(reversed(occupied))
+        legal_moves = self.check_legal_moves(occupied, len(self.sequence) - index)
+        legal_moves = self.canonical_moves(legal_moves, last, symmetry)
+
+        if not legal_moves:
+            self.stats["dead ends"] += 1
+            return
+
+        if self.search_stats is not None:
+            self.search_stats.count("score evaluations", len(legal_moves))
+
+        # Boltzmann factors of the moves, relative to the best one to avoid overflow
+        moves = list(legal_moves)
+        weights = self.pair_weights[index]
+        points = [sum(bond[2] for bond in Protein.bonds(occupied, move, weights, self.directions)) for move in moves]
+        lowest = min(points)
+        factors = [math.exp((lowest - move_points) / self.temperature) for move_points in points]
+        total = sum(factors)
+        log_weight += math.log(total) - lowest / self.temperature
+
+        # compare the weight to the average weight of chains at the next length
+        log_average = self.log_weight_sums[index + 1] - math.log(self.stats["tours"])
+        copies = 1
+        if log_average > -math.inf:
+            if log_weight > log_average + self.log_upper_threshold and self.population < self.max_population:
+                copies = self.max_clones
+                log_weight -= math.log(copies)
+                self.population += copies - 1
+                self.stats["clones"] += copies - 1
+                self.stats["chains"] += copies - 1
+            elif log_weight < log_average + self.log_lower_threshold:
+                if self.random.random() < 0.5:
+                    self.stats["prunes"] += 1
+                    return
+                log_weight += math.log(2)
+
+        for _ in range(copies):
+            choice = self.random.choices(range(len(moves)), weights=factors)[0]
+            move = moves[choice]
+
+            occupied[move] = index
+            self.grow(occupied, score + points[choice], self.move_symmetry(symmetry, last, move), index + 1, log_weight)
+            del occupied[move]
+
+    def report(self):
+        """
+        Print the throughput statistics of the tours.
+        """
+        seconds = max(self.stats["seconds"], 1e-9)
+        print(
+            f"\nPERM: {self.stats['tours']} tours, {self.stats['chains']} chains, "
+            f"{self.stats['valid folds']} valid folds ({self.stats['valid folds'] / seconds:.1f} per second), "
+            f"{self.stats['clones']} clones, {self.stats['prunes']} prunes, {self.stats['dead ends']} dead ends, "
+            f"{self.stats['nodes'] / seconds:.0f} nodes per second"
+        )
+
+def log_add(log_a: float, log_b: float):
+    """
+    Calculate log(a + b) from log(a) and log(b) without leaving the logarithmic scale.
+
+    Returns:
+        float: The logarithm of the sum
+    """
+    if log_a == -math.inf:
+        return log_b
+    if log_b == -math.inf:
+        return log_a
+    if log_a < log_b:
+        log_a, log_b = log_b, log_a
+    return log_a + math.log1p(math.exp(log_b - log_a))
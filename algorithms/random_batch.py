@@ -0,0 +1,126 @@
+"""
+Sampling and scoring of batches of random folds with NumPy, for the batch mode of
+RandomFolding. The functions are kept apart from RandomFolding, so NumPy is only loaded
+when the batch mode is used.
+"""
+import numpy as np
+from classes.protein_class import INTERACTIONS, pair_tables
+
+# Fold directions and coordinate steps of the batches; direction i ^ 1 is the opposite of direction i
+BATCH_FOLDS = np.array([1, -1, 2, -2, 3, -3], dtype=np.int8)
+BATCH_STEPS = np.array([(1, 0, 0), (-1, 0, 0), (0, 1, 0), (0, -1, 0), (0, 0, 1), (0, 0, -1)], dtype=np.int64)
+
+def numpy_generator(seed: int = None, worker: int = 0):
+    """
+    Creates the random number generator of the batches.
+
+    Parameters:
+        seed (int): The seed, None for a random seed.
+        worker (int): The number of the worker, every worker gets its own stream.
+
+    Returns:
+        np.random.Generator: The random number generator.
+    """
+    return np.random.default_rng(None if seed is None else [seed, worker])
+
+def generate_batch(numpy_random, sequence: str, threeD: bool, size: int):
+    """
+    Generates a batch of random folds without immediate reversals.
+
+    Unlike RandomFolding.generate_random_folds, mirror images and rotations are not removed, as they
+    score the same.
+
+    Parameters:
+        numpy_random (np.random.Generator): The random number generator, see numpy_generator.
+        sequence (str): The sequence of amino acids.
+        threeD (bool): Indicates if the protein is folded in 3D.
+        size (int): The number of folds to generate.
+
+    Returns:
+        np.ndarray: An int8 array of shape (size, len(sequence) - 1) with the direction
+                    index (into BATCH_FOLDS) of every fold; the first fold is always 1.
+    """
+    number_of_directions = 6 if threeD else 4
+    directions = np.zeros((size, len(sequence) - 1), dtype=np.int8)
+
+    for step in range(1, len(sequence) - 1):
+        # choose from every direction except the opposite of the previous one
+        choice = numpy_random.integers(0, number_of_directions - 1, size=size, dtype=np.int8)
+        opposite = directions[:, step - 1] ^ 1
+        directions[:, step] = choice + (choice >= opposite)
+
+    return directions
+
+def score_batch(sequence: str, threeD: bool, directions: np.ndarray, interactions: tuple = INTERACTIONS):
+    """
+    Finds the valid folds in a batch and calculates their scores in one array pass.
+
+    The coordinates follow from a cumulative sum of the steps. Every coordinate is packed
+    into one integer key; a fold intersects itself if its sorted keys contain a duplicate.
+    Bonds are found by looking up the key of every neighbour in the sorted keys.
+
+    Parameters:
+        sequence (str): The sequence of amino acids.
+        threeD (bool): Indicates if the protein is folded in 3D.
+        directions (np.ndarray): The direction indices made by generate_batch.
+        interactions (tuple): The points of a bond between two amino acid types, see INTERACTIONS.
+
+    Returns:
+        tuple: (boolean mask of the valid folds, int array with their scores)
+    """
+    length = len(sequence)
+    size = len(directions)
+
+    # coordinates of all amino acids, starting at (0, 0, 0)
+    coordinates = np.zeros((size, length, 3), dtype=np.int64)
+    np.cumsum(BATCH_STEPS[directions], axis=1, out=coordinates[:, 1:])
+
+    # pack the coordinates, shifted to be non-negative, into one key per amino acid
+    base = 2 * length + 1
+    shifted = coordinates + length
+    keys = (shifted[:, :, 0] * base + shifted[:, :, 1]) * base + shifted[:, :, 2]
+
+    sorted_keys = np.sort(keys, axis=1)
+    valid = ~np.any(sorted_keys[:, 1:] == sorted_keys[:, :-1], axis=1)
+
+    keys = keys[valid]
+    rows = len(keys)
+    if rows == 0:
+        return valid, np.zeros(0, dtype=np.int64)
+
+    # make the keys unique over the whole batch, so one sorted array can be searched
+    row_offsets = (np.arange(rows, dtype=np.int64) * base ** 3)[:, None]
+    order = np.argsort(keys, axis=1)
+    flat_keys = (np.take_along_axis(keys, order, axis=1) + row_offsets).ravel()
+    flat_order = order.ravel()
+
+    # points of the bond between every pair of amino acids, 0 for connected ones, see pair_tables
+    points = np.array(pair_tables(sequence, interactions)[2], dtype=np.int64)
+
+    # look in the positive direction of every axis, so every bond is found once
+    scores = np.zeros(rows, dtype=np.int64)
+    residues = np.arange(length)
+    for step in BATCH_STEPS[0:(6 if threeD else 4):2]:
+        neighbours = (keys + row_offsets + (step[0] * base + step[1]) * base + step[2]).ravel()
+        positions = np.minimum(np.searchsorted(flat_keys, neighbours), len(flat_keys) - 1)
+        found = (flat_keys[positions] == neighbours).reshape(rows, length)
+        partners = flat_order[positions].reshape(rows, length)
+
+        scores += np.where(found, points[residues, partners], 0).sum(axis=1)
+
+    return valid, scores
+
+def best_fold(directions: np.ndarray, valid: np.ndarray, scores: np.ndarray):
+    """
+    Finds the fold with the lowest score in a batch.
+
+    Parameters:
+        directions (np.ndarray): The direction indices made by generate_batch.
+        valid (np.ndarray): The boolean mask of the valid folds, see score_batch.
+        scores (np.ndarray): The scores of the valid folds, see score_batch.
+
+    Returns:
+        list[int]: The fold directions of the best fold.
+    """
+    best = np.argmin(scores)
+    return BATCH_FOLDS[directions[valid][best]].tolist()
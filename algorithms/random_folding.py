@@ -1,12 +1,101 @@
-import random
+import time
 from .algorithm_class import Algorithm
-from classes.protein_class import Protein
+from classes.protein_class import INTERACTIONS, Protein
 
 class RandomFolding(Algorithm):
-    def __init__(self, sequence: str, iterations: int, output_file: str, threeD: bool):
-        super().__init__(sequence, iterations, output_file, threeD)
-        self.protein = Protein(self.sequence, self.output_file, self.threeD)
+    def __init__(self, sequence: str, iterations: int, output_file: str, threeD: bool, mode: str = "rejection", batch_size: int = 10000,
+                 backtrack: int = 3, interactions: tuple = INTERACTIONS):
+        """
+        Initializes the random folding algorithm.
+
+        Parameters:
+            sequence (str): The sequence of amino acids.
+            iterations (int): The number of iterations to run the algorithm.
+            output_file (str): The path/filename for the output file.
+            threeD (bool): Indicates if the protein should be folded in 3D.
+            mode (str): 'rejection' builds one fold per attempt, 'batch' samples
+                        `batch_size` folds at once with NumPy in every iteration, and
+                        'growth' grows the fold from its tip on the legal moves.
+            batch_size (int): The number of folds sampled per iteration in batch mode.
+            backtrack (int): The number of amino acids the growth mode removes when the chain gets stuck.
+            interactions (tuple): The points of a bond between two amino acid types, see INTERACTIONS.
+
+        NumPy is only imported in batch mode, see algorithms/random_batch.py.
+        """
+        super().__init__(sequence, iterations, output_file, threeD, interactions)
+        self.protein = Protein(self.sequence, self.output_file, self.threeD, self.interactions)
         self.failure_count = 0
+        self.mode = mode
+        self.batch_size = batch_size
+        self.backtrack = backtrack
+        self.numpy_random = None
+
+        # a random chain rarely traps itself, so backing up is cheaper than the dead end flood fill
+        if mode == "growth":
+            self.dead_end_pruning = False
+
+    def seed(self, seed: int = None, worker: int = 0):
+        """
+        Seeds the random number generators of the algorithm, including the one of the batch mode.
+
+        Parameters:
+            seed (int): The seed, None for a random seed.
+            worker (int): The number of the worker, every worker gets its own stream.
+        """
+        super().seed(seed, worker)
+        if self.mode == "batch":
+            from .random_batch import numpy_generator
+            self.numpy_random = numpy_generator(seed, worker)
+
+    def checkpoint_state(self):
+        """
+        Collects the state of the experiment for a checkpoint, including the generator of the batch mode.
+
+        Returns:
+            dict: The state of the experiment, see Algorithm.checkpoint_state.
+        """
+        state = super().checkpoint_state()
+        if self.numpy_random is not None:
+            state["numpy random"] = self.numpy_random.bit_generator.state
+        state["failure count"] = self.failure_count
+        return state
+
+    def restore_state(self, state: dict):
+        """
+        Restores the state of the experiment from a checkpoint, see checkpoint_state.
+
+        Parameters:
+            state (dict): The state that was written to the checkpoint.
+        """
+        super().restore_state(state)
+        if "numpy random" in state:
+            self.numpy_random.bit_generator.state = state["numpy random"]
+        self.failure_count = state["failure count"]
+
+    def run_iterations(self, workers: int = 1, seed: int = None, time_budget: float = None):
+        """
+        Runs the iterations of the experiment (see Algorithm.run_iterations) and reports the
+        number of valid folds per second, to compare the throughput of the modes.
+
+        Parameters:
+            workers (int): The number of processes to run the iterations in.
+            seed (int): The seed of the random number generators, None for a random seed.
+            time_budget (float): The number of seconds the iterations may take, None for no limit.
+
+        Returns:
+            int: The best score.
+        """
+        best_score = super().run_iterations(workers, seed, time_budget)
+        self.report()
+        return best_score
+
+    def report(self):
+        """
+        Prints the number of valid folds found per second. Every valid fold is counted in
+        self.valid_folds, and in a serial run its score is added to self.scores.
+        """
+        seconds = max(time.time() - self.start_time, 1e-9)
+        print(f"\nRandom folding ({self.mode}): {self.valid_folds} valid folds in {seconds:.2f} seconds ({self.valid_folds / seconds:.1f} per second)")
 
     def run(self):
         """
@@ -14,9 +103,19 @@ class RandomFolding(Algorithm):
         configuration, we use a while True loop to allow the computer to
         make unlimited attempts. The while loop stops when we generate a Valid
         solution with the return statement. We keep track of the failure count
-        and print it when we find a valid solution.
+        and print it when we find a valid solution. At the deadline of a time
+        budget the attempts stop and None is returned.
         """
+        if self.mode == "batch":
+            return self.run_batch()
+        if self.mode == "growth":
+            return self.run_growth()
+
         while True:
+            # give up on this iteration at the deadline, see Algorithm.run_iterations
+            if self.out_of_time():
+                return None
+
             self.failure_count += 1
 
             # generate a random list of folds
@@ -25,18 +124,129 @@ class RandomFolding(Algorithm):
             # convert the folds to a protein structure
             self.protein = self.calculate_protein(folds)
 
+            if self.search_stats is not None:
+                self.search_stats.count("folds generated")
+
             # valid solution; every amino acid should have been placed in the protein
             if len(self.protein.amino_acids) == len(self.sequence):
                 print(f"Valid solution found after {self.failure_count} attempts.")
                 self.finish_up()
-                return self.protein.calculate_score()
+                score = self.protein.calculate_score()
+                self.scores.append(score)
+                self.valid_folds += 1
+                return score
+
+    def run_growth(self):
+        """
+        Grows a fold from its tip, choosing every next amino acid at random from the legal
+        moves of check_legal_moves, which already leaves out the occupied and surrounded
+        positions, so no fold has to be thrown away for crossing itself.
+
+        When the chain still gets stuck, only the last `backtrack` amino acids are removed
+        and the chain grows again from there. If it gets stuck again before it grew past the
+        previous dead end, twice as many amino acids are removed, so it cannot get trapped.
+        The dead ends are counted in self.failure_count.
+
+        Returns:
+            int: The score of the fold, None if the deadline passed first.
+        """
+        if self.out_of_time():
+            return None
+
+        # the chain starts from the first two amino acids, as placed by Protein
+        self.protein = Protein(self.sequence, self.output_file, self.threeD, self.interactions)
+        occupied = dict(self.protein.amino_acids)
+        symmetries = [0] * len(occupied)
+        dead_ends = 0
+        last_dead_end = 0
+        distance = self.backtrack
+
+        while len(occupied) < len(self.sequence):
+            index = len(occupied)
+            last = next(reversed(occupied))
+            legal_moves = self.check_legal_moves(occupied, len(self.sequence) - index)
+            legal_moves = self.canonical_moves(legal_moves, last, symmetries[-1])
+
+            if not legal_moves:
+                dead_ends += 1
+                if self.out_of_time():
+                    return None
+
+                distance = distance * 2 if index <= last_dead_end else self.backtrack
+                last_dead_end = index
+
+                # the first two amino acids stay in place
+                for _ in range(min(distance, index - 2)):
+                    occupied.popitem()
+                    symmetries.pop()
+                continue
+
+            move = self.random.choice(tuple(legal_moves))
+            symmetries.append(self.move_symmetry(symmetries[-1], last, move))
+            occupied[move] = self.sequence[index]
+
+        self.failure_count += dead_ends
+        if self.search_stats is not None:
+            self.search_stats.count("folds generated")
+            self.search_stats.count("dead ends", dead_ends)
+
+        print(f"Valid solution found after {dead_ends} dead ends.")
+        for coordinate, type in list(occupied.items())[2:]:
+            self.protein.add_coordinate(coordinate, type)
+        self.finish_up()
+        score = self.protein.calculate_score()
+        self.scores.append(score)
+        self.valid_folds += 1
+        return score
+
+    def run_batch(self):
+        """
+        Samples batches of random folds until a batch contains a valid one, and keeps the
+        best fold of that batch. Only the best fold is turned into a Protein.
+
+        The scores of all valid folds are added to self.scores.
+
+        Returns:
+            int: The score of the best fold in the batch, None if the deadline passed first.
+        """
+        from .random_batch import numpy_generator, generate_batch, score_batch, best_fold
+
+        if self.numpy_random is None:
+            self.numpy_random = numpy_generator()
+
+        while True:
+            if self.out_of_time():
+                return None
+
+            with self.phase("generate"):
+                directions = generate_batch(self.numpy_random, self.sequence, self.threeD, self.batch_size)
+            with self.phase("score"):
+                valid, scores = score_batch(self.sequence, self.threeD, directions, self.interactions)
+            self.failure_count += len(valid) - len(scores)
+
+            if self.search_stats is not None:
+                self.search_stats.count("folds generated", len(valid))
+                self.search_stats.count("score evaluations", len(scores))
+
+            if len(scores):
+                break
+
+        print(f"Batch of {self.batch_size} folds gave {len(scores)} valid solutions.")
+        self.scores.extend(scores.tolist())
+        self.valid_folds += len(scores)
+
+        folds = best_fold(directions, valid, scores)
+        self.protein = self.calculate_protein(folds)
+        self.finish_up()
+        return self.protein.calculate_score()
 
     def generate_random_folds(self):
         """
         Base folds: Typically, the first amino acid is placed at a fixed coordinate
         ((0,0,0)), and the second one is placed neigboring to it ((1,0,0) in 2D
         or (1,0,0,0) in 3D). This is based on mirroring and symmetry,
-        which result in equivalent solutions
+        which result in equivalent solutions. The remaining mirror images and
+        rotations are removed with Algorithm.allowed_fold.
         """
         # generate a random list of folds based on whether it's 2D or 3D.
         if self.threeD:
@@ -47,52 +257,15 @@ class RandomFolding(Algorithm):
         # create an empty list to store the randomly chosen folds
         folds = [1]
         previous_fold = 1
+        symmetry = 0
 
         # loop through the sequence length minus the first two base folds
         for _ in range(len(self.sequence) - 2):
-            # randomly select a fold and add the fold to the list
-            fold = random.choice(tuple(possible_folds.difference([previous_fold * -1])))
+            # randomly select a canonical fold and add the fold to the list
+            candidates = [fold for fold in possible_folds.difference([previous_fold * -1]) if self.allowed_fold(fold, symmetry)]
+            fold = self.random.choice(candidates)
+            symmetry = self.next_symmetry(symmetry, fold)
             previous_fold = fold
             folds.append(fold)
 
         return folds
-
-    def calculate_protein(self, folds:list[int]):
-        """
-        Calculates the 3D coordinates of the protein based on its fold directions.
-
-        This method uses the provided list of fold directions to iteratively calculate the
-        3D coordinates for each amino acid in the protein sequence, starting from a fixed
-        initial coordinate. It updates the new protein object with these coordinates and
-        returns the newly constructed protein.
-
-        Parameters:
-            folds (list[int]): A list of fold directions representing changes in coordinates.
-                            Each integer corresponds to a specific fold direction, with
-                            positive and negative values indicating direction.
-
-        Returns:
-            Protein: A new Protein object with the calculated 3D coordinates.
-        """
-        x,y,z = 1,0,0
-
-        new_protein = Protein(self.protein.sequence, self.protein.output_file, self.protein.threeD)
-
-        # Map fold directions to coordinate changes
-        direction_map = {
-            1: (1, 0, 0), -1: (-1, 0, 0),
-            2: (0, 1, 0), -2: (0, -1, 0),
-            3: (0, 0, 1), -3: (0, 0, -1)
-        }
-
-        # Skip the first 2 folds and exclude the last fold (0 is a placeholder)
-        for i, fold in enumerate(folds[1:]):
-
-            # Update coordinates based on the fold direction
-            dx, dy, dz = direction_map.get(fold, (0, 0, 0))
-            x, y, z = x + dx, y + dy, z + dz
-
-            # Add the new coordinate and amino acid to the protein
-            new_protein.add_coordinate((x, y, z), self.protein.sequence[i+2])
-
-        return new_protein
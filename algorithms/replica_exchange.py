@@ -0,0 +1,199 @@
+import math
+import time
+from array import array
+from multiprocessing import Pool
+from .algorithm_class import Algorithm
+from .hill_climber import HillClimber
+from classes.protein_class import INTERACTIONS, Protein
+
+class ReplicaExchange(Algorithm):
+    """
+    Replica exchange (parallel tempering) Monte Carlo for protein folding prediction.
+
+    Runs a number of Monte Carlo replicas of the fold, each at its own temperature and in
+    its own process, with the moves of the HillClimber. After every exchange interval the
+    folds of neighbouring temperatures are swapped following the Metropolis criterion, so
+    folds found at high temperatures can settle at low ones.
+    """
+    def __init__(self, sequence: str, iterations: int, output_file: str, threeD: bool, replicas: int = 4,
+                 min_temperature: float = 0.1, max_temperature: float = 2.0, exchange_interval: int = 1000, workers: int = None,
+                 interactions: tuple = INTERACTIONS):
+        """
+        Initialize the Replica Exchange algorithm.
+
+        Parameters:
+            sequence: Amino acid sequence of the protein
+            iterations: Number of moves every replica tries
+            output_file: Path to save output files
+            threeD: True for 3D folding, False for 2D
+            replicas: Number of replicas
+            min_temperature: Temperature of the coldest replica
+            max_temperature: Temperature of the hottest replica
+            exchange_interval: Number of moves between two exchanges
+            workers: Number of processes, one per replica by default
+            interactions: Points of a bond between two amino acid types, see INTERACTIONS
+        """
+        super().__init__(sequence, 1, output_file, threeD, interactions)
+        self.protein = Protein(sequence, output_file, threeD, interactions)
+        self.steps = iterations
+        self.replicas = replicas
+        self.exchange_interval = exchange_interval
+        self.workers = workers if workers is not None else replicas
+        self.worker_seed = None
+
+        # temperatures from cold to hot, spaced geometrically
+        ratio = (max_temperature / min_temperature) ** (1 / max(replicas - 1, 1))
+        self.temperatures = [min_temperature * ratio ** replica for replica in range(replicas)]
+
+    def run_experiment(self, workers: int = 1, seed: int = None, time_budget: float = None):
+        """
+        Execute the experiment. Replica exchange runs a single iteration, in which the
+        replicas are spread over the workers.
+
+        Parameters:
+            workers: Number of processes, if more than one
+            seed: Seed of the random number generators
+            time_budget: Number of seconds the experiment may take, None for no limit
+        """
+        if workers > 1:
+            self.workers = workers
+        super().run_experiment(1, seed, time_budget)
+
+    def seed(self, seed: int = None, worker: int = 0):
+        """
+        Seed the random number generator of the exchanges, and remember the seed for the replicas.
+
+        Parameters:
+            seed: The seed, None for a random seed
+            worker: The number of the worker
+        """
+        super().seed(seed, worker)
+        self.worker_seed = seed
+
+    def run(self):
+        """
+        Execute the replica exchange.
+
+        Returns:
+            int: Score of the best fold found by any replica
+        """
+        # every replica grows its own random fold in its worker, at the start of the first round
+        folds = [None] * self.replicas
+        energies = [None] * self.replicas
+        self.best_fold_score = math.inf
+        best_folds = None
+
+        # the first round also grows the starting folds, so it runs even without moves
+        rounds = max(-(-self.steps // self.exchange_interval), 1)
+        pool = Pool(self.workers, initializer=init_worker, initargs=(self.sequence, self.threeD, self.interactions)) if self.workers > 1 else None
+        if pool is None:
+            init_worker(self.sequence, self.threeD, self.interactions)
+
+        try:
+            self.progress_bar(0, rounds)
+            for round in range(rounds):
+                steps = min(self.exchange_interval, self.steps - round * self.exchange_interval)
+                tasks = [
+                    (folds[replica], self.temperatures[replica], steps, self.worker_seed, f"{replica}-{round}", self.deadline)
+                    for replica in range(self.replicas)
+                ]
+                with self.phase("replicas"):
+                    results = pool.map(run_replica, tasks) if pool is not None else list(map(run_replica, tasks))
+
+                for replica, (energy, replica_folds, best_energy, replica_best_folds) in enumerate(results):
+                    folds[replica] = replica_folds
+                    energies[replica] = energy
+                    if best_energy < self.best_fold_score:
+                        self.best_fold_score = best_energy
+                        best_folds = replica_best_folds
+                        self.record_score(best_energy)
+
+                self.exchange(folds, energies, round)
+                self.progress_bar(round + 1, rounds)
+
+                if self.search_stats is not None:
+                    self.search_stats.count("moves tried", steps * self.replicas)
+                    self.search_stats.end_step(round=round, best=self.best_fold_score, energies=list(energies))
+
+                # stop between rounds at the deadline of a time budget
+                if self.out_of_time():
+                    break
+        finally:
+            if pool is not None:
+                pool.close()
+
+        self.protein = self.calculate_protein(list(best_folds))
+        self.finish_up()
+        return self.protein.calculate_score()
+
+    def exchange(self, folds: list, energies: list, round: int):
+        """
+        Swap the folds of neighbouring temperatures following the Metropolis criterion.
+
+        Even and odd pairs of neighbours take turns, so every pair is tried every other round.
+
+        Parameters:
+            folds: Fold arrays of the replicas, from cold to hot
+            energies: Scores of the replicas
+            round: Number of the current round
+        """
+        for replica in range(round % 2, self.replicas - 1, 2):
+            cold, hot = replica, replica + 1
+            delta = (1 / self.temperatures[cold] - 1 / self.temperatures[hot]) * (energies[cold] - energies[hot])
+            if delta >= 0 or self.random.random() < math.exp(delta):
+                folds[cold], folds[hot] = folds[hot], folds[cold]
+                energies[cold], energies[hot] = energies[hot], energies[cold]
+
+# Hill climber of the worker process, set once when the process starts
+worker_climber = None
+
+def init_worker(sequence: str, threeD: bool, interactions: tuple):
+    """
+    Create the hill climber that runs the replicas in a worker process.
+
+    Parameters:
+        sequence: Amino acid sequence of the protein
+        threeD: True for 3D folding, False for 2D
+        interactions: Points of a bond between two amino acid types, see INTERACTIONS
+    """
+    global worker_climber
+    worker_climber = HillClimber(sequence, 0, None, threeD, interactions=interactions)
+
+def run_replica(task: tuple):
+    """
+    Run one replica at a fixed temperature for a number of moves.
+
+    Parameters:
+        task: (fold array, or None to start from a new random fold, temperature, number of moves, seed, replica and round,
+            deadline of the time budget or None)
+
+    Returns:
+        tuple: (score, fold array, best score, best fold array) of the replica
+    """
+    folds, temperature, steps, seed, worker, deadline = task
+    climber = worker_climber
+    climber.seed(seed, worker)
+    climber.start_time, climber.deadline = time.time(), deadline
+    if folds is None:
+        climber.load_coordinates(climber.starting_fold())
+    else:
+        climber.load_coordinates(list(climber.calculate_protein(list(folds)).amino_acids))
+
+    best_energy = climber.energy
+    best_coordinates = list(climber.coordinates)
+    for step in range(steps):
+        climber.try_move(temperature)
+        if climber.energy < best_energy:
+            best_energy = climber.energy
+            best_coordinates = list(climber.coordinates)
+
+        # stop the round at the deadline of a time budget
+        if (step + 1) % 100 == 0 and climber.out_of_time():
+            break
+
+    return (
+        climber.energy,
+        array('b', climber.coordinates_to_folds(climber.coordinates)),
+        best_energy,
+        array('b', climber.coordinates_to_folds(best_coordinates))
+    )
@@ -0,0 +1,322 @@
+"""
+Benchmark suite for the hot paths and the engines of the protein folding algorithms.
+
+The micro-benchmarks time single calls of the functions every engine spends its time in,
+the macro-benchmarks time complete engine runs on the standard HP benchmark sequences, and
+the startup benchmarks time new interpreters that import or run main.py. The
+results are written as JSON, and can be compared against a stored baseline to flag runs
+that got slower (or found a worse fold) than the baseline.
+
+Run from the root of the repository with:
+
+    python -m benchmarks.benchmark [--micro | --macro | --startup] [--only NAME] [--output FILE]
+                                   [--baseline FILE] [--save-baseline] [--threshold FRACTION]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+from datetime import datetime
+
+from classes.protein_class import Protein
+from algorithms.beam import Beam
+from algorithms.random_folding import RandomFolding
+from algorithms.branch_and_bound import BranchAndBound
+from algorithms.hill_climber import HillClimber
+from algorithms.replica_exchange import ReplicaExchange
+from algorithms.perm import PERM
+
+# Standard HP benchmark sequences with the lowest known 2D score, and the 50-mer with
+# cysteines from the assignment
+SEQUENCES = {
+    "S1-20": ("HPHPPHHPHPPHPHHPPHPH", -9),
+    "S2-24": ("HHPPHPPHPPHPPHPPHPPHPPHH", -9),
+    "S3-25": ("PPHPPHHPPPPHHPPPPHHPPPPHH", -8),
+    "S4-36": ("PPPHHPPHHPPPPPHHHHHHHPPHHPPPPHHPPHPP", -14),
+    "S5-48": ("PPHPPHHPPHHPPPPPHHHHHHHHHHPPPPPPHHPPHHPPHPPHHHHH", -23),
+    "S6-50": ("HHPHPHPHPHHHHPHPPPHPPPHPPPPHPPPHPPPHPHHHHPHPHPHPHH", -21),
+    "C-50": ("HCPHPCPHPCHCHPHPPPHPPPHPPPPHPCPHPPPHPHHHCCHCHCHCHH", None)
+}
+
+# Engine runs of the macro-benchmarks: (name, sequence, 3D, function that creates the engine)
+MACRO_BENCHMARKS = [
+    ("random batch", "S1-20", False, lambda sequence, threeD: RandomFolding(sequence, 5, None, threeD, mode="batch")),
+    ("random batch", "S1-20", True, lambda sequence, threeD: RandomFolding(sequence, 5, None, threeD, mode="batch")),
+    ("random rejection 20", "S6-50", False, lambda sequence, threeD: RandomFolding(sequence, 20, None, threeD)),
+    ("random growth 1000", "S6-50", False, lambda sequence, threeD: RandomFolding(sequence, 1000, None, threeD, mode="growth")),
+    ("random growth 1000", "S6-50", True, lambda sequence, threeD: RandomFolding(sequence, 1000, None, threeD, mode="growth")),
+    ("beam 100", "S4-36", False, lambda sequence, threeD: Beam(sequence, 100, None, threeD)),
+    ("beam 100", "S5-48", False, lambda sequence, threeD: Beam(sequence, 100, None, threeD)),
+    ("beam 100", "C-50", True, lambda sequence, threeD: Beam(sequence, 100, None, threeD)),
+    ("beam 100 heuristic", "S4-36", False, lambda sequence, threeD: Beam(sequence, 100, None, threeD, heuristic=True)),
+    ("beam 100 heuristic", "C-50", True, lambda sequence, threeD: Beam(sequence, 100, None, threeD, heuristic=True)),
+    ("beam 100 lookahead 2", "S4-36", False, lambda sequence, threeD: Beam(sequence, 100, None, threeD, lookahead_depth=2)),
+    ("beam 100 lookahead 2", "S1-20", True, lambda sequence, threeD: Beam(sequence, 100, None, threeD, lookahead_depth=2)),
+    ("branch and bound", "S1-20", False, lambda sequence, threeD: BranchAndBound(sequence, None, threeD)),
+    ("perm 1000", "S4-36", False, lambda sequence, threeD: PERM(sequence, 1000, None, threeD)),
+    ("perm 1000", "S6-50", True, lambda sequence, threeD: PERM(sequence, 1000, None, threeD)),
+    ("simulated annealing 20000", "S4-36", False,
+     lambda sequence, threeD: HillClimber(sequence, 20000, None, threeD, schedule="exponential", temperature=2.0)),
+    ("simulated annealing 20000", "S4-36", True,
+     lambda sequence, threeD: HillClimber(sequence, 20000, None, threeD, schedule="exponential", temperature=2.0)),
+    ("replica exchange 5000", "S4-36", False, lambda sequence, threeD: ReplicaExchange(sequence, 5000, None, threeD, workers=1)),
+]
+
+def time_call(function, repeat: int = 5):
+    """
+    Times a function that takes no arguments.
+
+    The number of calls per measurement is chosen so one measurement takes at least 0.2
+    seconds, and the fastest of the measurements is used, as the others were slowed down by
+    other processes.
+
+    Parameters:
+        function: The function to time.
+        repeat (int): The number of measurements.
+
+    Returns:
+        dict: The seconds per call and the number of calls per measurement.
+    """
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    number = max(number, 1)
+    seconds = min(timer.repeat(repeat=repeat, number=number)) / number
+    return {"seconds": seconds, "calls": number}
+
+def micro_benchmarks(only: str = None):
+    """
+    Times single calls of the hot paths on a fold of the 36-mer.
+
+    Parameters:
+        only (str): Only run the benchmarks with this text in their name.
+
+    Returns:
+        dict: The results of the benchmarks by name.
+    """
+    sequence, _ = SEQUENCES["S4-36"]
+    results = {}
+
+    # a fold to measure on, and the same fold halfway through
+    beam = Beam(sequence, 10, None, False)
+    with contextlib.redirect_stdout(io.StringIO()):
+        beam.run()
+    folds = beam.protein.folds
+    protein = beam.calculate_protein(folds)
+    coordinates = list(protein.amino_acids)
+    half = len(sequence) // 2
+    occupied = {coordinate: index for index, coordinate in enumerate(coordinates[:half])}
+
+    # a beam of 100 states halfway through the sequence
+    step_beam = Beam(sequence, 100, None, False)
+    step_beam.duplicates = []
+    for index in range(2, half):
+        step_beam.step(sequence[index], index - 1)
+    states = step_beam.states
+
+    def beam_step():
+        step_beam.states = states
+        step_beam.duplicates = []
+        step_beam.step(sequence[half], half - 1)
+
+    # calculate_score returns the running score, so a full rescore places every amino acid again
+    def rescore():
+        rescored = Protein(sequence, None, False)
+        for coordinate in coordinates[2:]:
+            rescored.add_coordinate(coordinate, protein.amino_acids[coordinate])
+        return rescored.calculate_score()
+
+    benchmarks = {
+        "Protein rescore of a fold": rescore,
+        "Protein creation and add_coordinate": lambda: Protein(sequence, None, False).add_coordinate((0, 1, 0), 'H'),
+        "Algorithm.calculate_protein": lambda: beam.calculate_protein(folds),
+        "Algorithm.check_legal_moves": lambda: beam.check_legal_moves(occupied),
+        "Algorithm.check_legal_moves dead ends": lambda: beam.check_legal_moves(occupied, len(sequence) - half),
+        "Beam.step 100": beam_step
+    }
+
+    for name, function in benchmarks.items():
+        if only is not None and only not in name:
+            continue
+        results[name] = time_call(function)
+        print(f"{name:45} {results[name]['seconds'] * 1e6:12.2f} µs")
+
+    return results
+
+def macro_benchmarks(only: str = None):
+    """
+    Times complete engine runs on the standard benchmark sequences.
+
+    Every engine is seeded, so the same code always finds the same fold and the scores
+    can be compared between runs too.
+
+    Parameters:
+        only (str): Only run the benchmarks with this text in their name.
+
+    Returns:
+        dict: The results of the benchmarks by name.
+    """
+    results = {}
+    for engine, sequence_name, threeD, create in MACRO_BENCHMARKS:
+        name = f"{engine} {sequence_name} {'3D' if threeD else '2D'}"
+        if only is not None and only not in name:
+            continue
+
+        sequence, best_known = SEQUENCES[sequence_name]
+        algorithm = create(sequence, threeD)
+        algorithm.seed(0)
+
+        # the serial loop of run_experiment, without the output files and plots
+        start_time = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            score = min(algorithm.run() for _ in range(algorithm.iterations))
+        seconds = time.perf_counter() - start_time
+
+        results[name] = {"seconds": seconds, "score": score}
+        if not threeD and best_known is not None:
+            results[name]["best known"] = best_known
+        print(f"{name:45} {seconds:10.2f} s   score {score}")
+
+    return results
+
+def startup_benchmarks(only: str = None, repeat: int = 5):
+    """
+    Times new interpreters that import main.py, and that run a short headless experiment
+    with it, which is what every short job of a batch of separate runs pays for.
+
+    Parameters:
+        only (str): Only run the benchmarks with this text in their name.
+        repeat (int): The number of measurements, of which the fastest is used.
+
+    Returns:
+        dict: The results of the benchmarks by name.
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        experiment = os.path.join(directory, "experiment.txt")
+        with open(experiment, 'w') as file:
+            file.write(f"keten = {SEQUENCES['S1-20'][0]}\nalgoritme = random\niteraties = 1\nlookahead = 0\n")
+
+        benchmarks = {
+            "python startup": [sys.executable, "-c", "pass"],
+            "import main": [sys.executable, "-c", "import main"],
+            "main.py --no-plot random S1-20": [
+                sys.executable, "main.py", experiment, os.path.join(directory, "output.csv"), "--no-plot", "-seed", "0"
+            ]
+        }
+
+        for name, command in benchmarks.items():
+            if only is not None and only not in name:
+                continue
+
+            times = []
+            for _ in range(repeat):
+                start_time = time.perf_counter()
+                subprocess.run(command, check=True, stdout=subprocess.DEVNULL)
+                times.append(time.perf_counter() - start_time)
+
+            results[name] = {"seconds": min(times)}
+            print(f"{name:45} {results[name]['seconds'] * 1e3:12.1f} ms")
+
+    return results
+
+def compare(results: dict, baseline: dict, threshold: float):
+    """
+    Compares the results to a baseline.
+
+    Parameters:
+        results (dict): The results of this run, as written by main.
+        baseline (dict): The results of the baseline run.
+        threshold (float): The fraction a benchmark may be slower than the baseline before it is flagged.
+
+    Returns:
+        list[str]: The regressions, empty if there are none.
+    """
+    regressions = []
+    for kind in ("micro", "macro", "startup"):
+        for name, result in results.get(kind, {}).items():
+            reference = baseline.get(kind, {}).get(name)
+            if reference is None:
+                continue
+
+            ratio = result["seconds"] / reference["seconds"]
+            flag = ""
+            if ratio > 1 + threshold:
+                flag = "SLOWER"
+                regressions.append(f"{name}: {ratio:.2f}x the time of the baseline")
+            elif ratio < 1 / (1 + threshold):
+                flag = "faster"
+
+            if "score" in result and "score" in reference and result["score"] > reference["score"]:
+                flag = (flag + " WORSE SCORE").strip()
+                regressions.append(f"{name}: score {result['score']}, baseline {reference['score']}")
+
+            print(f"{name:45} {ratio:6.2f}x baseline {flag}")
+
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks of the protein folding algorithms")
+    parser.add_argument('--micro', action='store_true', help="Only run the micro-benchmarks")
+    parser.add_argument('--macro', action='store_true', help="Only run the macro-benchmarks")
+    parser.add_argument('--startup', action='store_true', help="Only run the startup benchmarks")
+    parser.add_argument('--only', default=None, help="Only run the benchmarks with this text in their name")
+    parser.add_argument('--output', default="benchmarks/results.json", help="The JSON file to write the results to")
+    parser.add_argument('--baseline', default="benchmarks/baseline.json", help="The JSON file with the results to compare to")
+    parser.add_argument('--save-baseline', action='store_true', help="Store the results as the new baseline")
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help="The fraction a benchmark may be slower than the baseline before it is flagged")
+    args = parser.parse_args()
+
+    results = {
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": platform.platform()
+    }
+    run_all = not (args.micro or args.macro or args.startup)
+    if run_all or args.micro:
+        print("Micro-benchmarks")
+        results["micro"] = micro_benchmarks(args.only)
+    if run_all or args.macro:
+        print("\nMacro-benchmarks")
+        results["macro"] = macro_benchmarks(args.only)
+    if run_all or args.startup:
+        print("\nStartup benchmarks")
+        results["startup"] = startup_benchmarks(args.only)
+
+    with open(args.output, 'w') as file:
+        json.dump(results, file, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as file:
+            json.dump(results, file, indent=2)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline found at {args.baseline}, run with --save-baseline to store one")
+        return 0
+
+    with open(args.baseline, 'r') as file:
+        baseline = json.load(file)
+
+    print(f"\nCompared to the baseline of {baseline.get('date')}")
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print("\nRegressions:")
+        for regression in regressions:
+            print(f"- {regression}")
+        return 1
+
+    print("\nNo regressions")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
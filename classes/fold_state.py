@@ -0,0 +1,187 @@
+from operator import xor
+from classes.protein_class import INTERACTIONS, Protein
+
+# Mirror images of the lattice that keep the first two amino acids in place: the y and z
+# coordinates may be negated and swapped. Chains that are each other's mirror image along one
+# of these are equivalent, see FoldState.key
+SYMMETRIES = [
+    (swap, y_sign, z_sign) for swap in (False, True) for y_sign in (1, -1) for z_sign in (1, -1)
+]
+
+# Zobrist numbers of the (coordinate, type) pairs, filled in when they are first needed
+ZOBRIST_KEYS = {}
+
+def splitmix64(number: int):
+    """
+    Mixes an integer into a well spread 64-bit number with the splitmix64 function.
+
+    Returns:
+        int: The mixed 64-bit number.
+    """
+    number = (number + 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF
+    number = ((number ^ (number >> 30)) * 0xBF58476D1CE4E5B9) & 0xFFFFFFFFFFFFFFFF
+    number = ((number ^ (number >> 27)) * 0x94D049BB133111EB) & 0xFFFFFFFFFFFFFFFF
+    return number ^ (number >> 31)
+
+def zobrist_keys(coordinate: tuple[int, int, int], type: str):
+    """
+    Gives the Zobrist numbers of an amino acid of a type at a coordinate, one for each mirror
+    image in SYMMETRIES.
+
+    The numbers are derived from the coordinate and type instead of drawn from a random
+    number generator, so every process uses the same numbers.
+
+    Parameters:
+        coordinate (tuple): The (x, y, z) coordinates of the amino acid.
+        type (str): The type of the amino acid, or '*' for the end of the chain.
+
+    Returns:
+        tuple[int]: The 64-bit numbers of the coordinate and its mirror images.
+    """
+    keys = ZOBRIST_KEYS.get((coordinate, type))
+    if keys is None:
+        x, y, z = coordinate
+        mirrored = []
+        for swap, y_sign, z_sign in SYMMETRIES:
+            my, mz = (z, y) if swap else (y, z)
+            my, mz = my * y_sign, mz * z_sign
+            mirrored.append(splitmix64((x & 0xFFFF) << 40 | (my & 0xFFFF) << 24 | (mz & 0xFFFF) << 8 | ord(type)))
+        keys = ZOBRIST_KEYS[(coordinate, type)] = tuple(mirrored)
+    return keys
+
+class FoldState():
+    """
+    A compact, immutable search state of a partially folded protein.
+
+    Every state only stores the last amino acid that was placed and a pointer to the
+    state it was grown from, so children share the rest of the chain with their parent
+    instead of copying it. A full Protein is only built when it is needed for the output.
+
+    Every state also keeps the Zobrist hashes of its placed amino acids, updated with one
+    XOR per hash when a child is created, so equivalent states can be found (see key).
+    """
+    __slots__ = ('parent', 'coordinate', 'type', 'length', 'score', 'symmetry', 'zobrist', 'free_slots')
+
+    def __init__(self, parent, coordinate: tuple[int, int, int], type: str, score: int, symmetry: int = 0, free_slots: tuple = None):
+        """
+        Initializes a state by placing one amino acid after its parent state.
+
+        Parameters:
+            parent (FoldState): The state this one is grown from, None for the first amino acid.
+            coordinate (tuple): The (x, y, z) coordinates of the amino acid that is placed.
+            type (str): The type of the amino acid ('H', 'P', 'C').
+            score (int): The stability score of the chain up to and including this amino acid.
+            symmetry (int): The symmetry level of the chain, see Algorithm.allowed_fold.
+            free_slots (tuple): The free neighbours of the H and C amino acids by parity, see
+                                Algorithm.count_free_slots, or None if they were not counted.
+        """
+        self.parent = parent
+        self.coordinate = coordinate
+        self.type = type
+        self.length = parent.length + 1 if parent is not None else 1
+        self.score = score
+        self.symmetry = symmetry
+        self.free_slots = free_slots
+
+        # one hash for the chain and one for each of its mirror images
+        keys = zobrist_keys(coordinate, type)
+        self.zobrist = tuple(map(xor, parent.zobrist, keys)) if parent is not None else keys
+
+    @classmethod
+    def initial(cls, sequence: str):
+        """
+        Creates the state with the first two amino acids placed, as in Protein.__init__.
+
+        Parameters:
+            sequence (str): The sequence of amino acids.
+
+        Returns:
+            FoldState: The state holding the first two amino acids.
+        """
+        first = cls(None, (0, 0, 0), sequence[0], 0)
+        return cls(first, (1, 0, 0), sequence[1], 0)
+
+    def add(self, coordinate: tuple[int, int, int], type: str, score: int, symmetry: int = 0, free_slots: tuple = None):
+        """
+        Creates a child state with one more amino acid placed at the given coordinate.
+
+        Parameters:
+            coordinate (tuple): The (x, y, z) coordinates of the new amino acid.
+            type (str): The type of the new amino acid ('H', 'P', 'C').
+            score (int): The stability score of the child state.
+            symmetry (int): The symmetry level of the child state.
+            free_slots (tuple): The free neighbours of the H and C amino acids of the child state.
+
+        Returns:
+            FoldState: The new state.
+        """
+        return FoldState(self, coordinate, type, score, symmetry, free_slots)
+
+    def key(self):
+        """
+        Gives a hash that is the same for equivalent states: states with the same amino acids
+        at the same coordinates and the same end of the chain, or mirror images of such a state.
+        These states can gain the same points from here on, whatever path the chain took.
+
+        Returns:
+            int: The smallest hash of the state and its mirror images, including the end of the chain.
+        """
+        return min(map(xor, self.zobrist, zobrist_keys(self.coordinate, '*')))
+
+    def child_key(self, coordinate: tuple[int, int, int], type: str):
+        """
+        Gives the key of the child state with one more amino acid placed, without creating it.
+
+        Parameters:
+            coordinate (tuple): The (x, y, z) coordinates of the new amino acid.
+            type (str): The type of the new amino acid ('H', 'P', 'C').
+
+        Returns:
+            int: The key the child state would have, see key.
+        """
+        zobrist = map(xor, self.zobrist, zobrist_keys(coordinate, type))
+        return min(map(xor, zobrist, zobrist_keys(coordinate, '*')))
+
+    def chain(self):
+        """
+        Collects the placed amino acids by following the parent pointers.
+
+        Returns:
+            list[FoldState]: The states from the first to the last placed amino acid.
+        """
+        states = []
+        state = self
+        while state is not None:
+            states.append(state)
+            state = state.parent
+        states.reverse()
+        return states
+
+    def occupied(self):
+        """
+        Builds the dictionary {coordinate: index} of all placed amino acids, in chain order,
+        with the position of every amino acid in the chain to look its bonds up in the pair
+        tables, see Protein.bonds.
+
+        Returns:
+            dict: The coordinates and positions in the chain of the placed amino acids.
+        """
+        return {state.coordinate: index for index, state in enumerate(self.chain())}
+
+    def to_protein(self, sequence: str, output_file: str, threeD: bool, interactions: tuple = INTERACTIONS):
+        """
+        Builds a full Protein object from the chain of states.
+
+        Parameters:
+            sequence (str): The sequence of amino acids.
+            output_file (str): The path/filename for the output file.
+            threeD (bool): Indicates if the protein is folded in 3D.
+            interactions (tuple): The points of a bond between two amino acid types, see INTERACTIONS.
+
+        Returns:
+            Protein: A protein with all placed amino acids added.
+        """
+        protein = Protein(sequence, output_file, threeD, interactions)
+        for state in self.chain()[2:]:
+            protein.add_coordinate(state.coordinate, state.type)
+        return protein
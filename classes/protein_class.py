@@ -2,8 +2,66 @@
 # This script contains a Protein class with methods that are intended to come together in an algorithm to fold the protein.
 # This script is in partial fulfillment of the requirements for Algoritmen en Heuristieken at the University of Amsterdam.
 from collections import OrderedDict
+from functools import lru_cache
+
+# The amino acid types, in the order of their integer codes
+AMINO_ACIDS = "HPC"
+
+# Integer code of every amino acid type
+AMINO_CODES = {amino: code for code, amino in enumerate(AMINO_ACIDS)}
+
+# Points of a bond between two amino acid types, by their codes; P does not bond
+INTERACTIONS = (
+    (-1, 0, -1),
+    (0, 0, 0),
+    (-1, 0, -5)
+)
+
+# Label of the bond between two amino acid types, by their codes, as drawn by Visualise
+BOND_LABELS = tuple(
+    tuple(f"{AMINO_ACIDS[min(code1, code2)]}-{AMINO_ACIDS[max(code1, code2)]}" for code2 in range(len(AMINO_ACIDS)))
+    for code1 in range(len(AMINO_ACIDS))
+)
+
+@lru_cache(maxsize=64)
+def pair_tables(sequence: str, interactions: tuple = INTERACTIONS):
+    """
+    Encodes a sequence and precomputes which pairs of its amino acids can bond, and for how
+    many points. Every scorer looks the points of a bond up in these tables by the positions
+    of the two amino acids in the chain. The tables only depend on the sequence and the
+    energy model, so they are made once and shared by all proteins and algorithms.
+
+    Two amino acids can only bond if they are not connected in the chain, if their types
+    bond at all and if they are an odd number of positions apart: the square and cubic
+    lattices are bipartite, so amino acids at positions of the same parity are never neighbours.
+
+    Parameters:
+        sequence (str): The sequence of amino acids.
+        interactions (tuple): The points of a bond between two amino acid types, by their codes, see INTERACTIONS.
+
+    Returns:
+        tuple: (codes, pair_mask, pair_weights), with the codes of the amino acids as bytes,
+               pair_mask[i][j] 1 if amino acids i and j can bond and 0 otherwise, and
+               pair_weights[i][j] the points of that bond, 0 where the mask is 0.
+    """
+    codes = bytes(AMINO_CODES[amino] for amino in sequence)
+    length = len(codes)
+
+    pair_mask = tuple(
+        bytes(
+            1 if abs(index - partner) > 1 and (index - partner) % 2 and interactions[codes[index]][codes[partner]] else 0
+            for partner in range(length)
+        )
+        for index in range(length)
+    )
+    pair_weights = tuple(
+        tuple(interactions[codes[index]][codes[partner]] * pair_mask[index][partner] for partner in range(length))
+        for index in range(length)
+    )
+    return codes, pair_mask, pair_weights
+
 class Protein():
-    def __init__(self, sequence: str, output_file: str, threeD: bool):
+    def __init__(self, sequence: str, output_file: str, threeD: bool, interactions: tuple = INTERACTIONS):
         """
         Initializes the protein object with a sequence, output file, and 3D folding option.
 
@@ -11,6 +69,7 @@ class Protein():
             sequence (str): The sequence of amino acids.
             output_file (str): The path/filename for the output file.
             threeD (bool): Indicates if the protein should be folded and visualized in 3D (True) or 2D (False).
+            interactions (tuple): The points of a bond between two amino acid types, see INTERACTIONS.
 
         Initializes amino acids, folds, and adjacent amino acid relationships.
         """
@@ -18,53 +77,49 @@ class Protein():
         self.output_file = output_file
         self.threeD = threeD
 
+        # the sequence as integer codes and the bonds its amino acids can form, see pair_tables
+        self.interactions = interactions
+        self.codes, self.pair_mask, self.pair_weights = pair_tables(sequence, interactions)
+
         # Dictionary {coordinate: type}, representing the positions and types of amino acids
         self.amino_acids = OrderedDict()
         self.folds = []
         self.adjacent_amino_acids = {}
 
+        # Dictionary {coordinate: index}, the position in the chain of every amino acid, see bonds
+        self.positions = {}
+
+        # running stability score, updated every time an amino acid is added
+        self.score = 0
+
+        # possible neighbouring positions of an amino acid, in 2D or 3D
+        self.directions = [(1, 0, 0), (-1, 0, 0), (0, 1, 0), (0, -1, 0)]
+        if self.threeD:
+            self.directions += [(0, 0, 1), (0, 0, -1)]
+
         # add initial amino acids and fold, as rotational symmetry dictates that the first 2 amino acids are functionally identical no matter how they are placed
         self.amino_acids[(0,0,0)] = self.sequence[0]
         self.amino_acids[(1,0,0)] = self.sequence[1]
+        self.positions[(0,0,0)] = 0
+        self.positions[(1,0,0)] = 1
         self.folds.append(1)
 
     def calculate_score(self):
         """
-        Calculates the stability score for the current protein fold configuration.
+        Returns the stability score for the current protein fold configuration.
 
         The score is based on the types of bonds formed between adjacent amino acids:
         - H-H bonds: score -1
         - H-C bonds: score -1
         - C-C bonds: score -5
 
-        The function iterates through the list of amino acids, checking if each pair of amino acids is adjacent,
-        and assigns points based on their interaction.
+        The score is not recalculated here; it is kept up to date by add_coordinate,
+        which only checks the lattice neighbours of every amino acid that is added.
 
         Returns:
-            int: The calculated stability score of the protein.
+            int: The stability score of the protein.
         """
-        score = 0
-        amino_list = list(self.amino_acids.items())
-
-        # Check pairs of amino acids for adjacency and assign score based on interaction
-        for acid1 in range(len(self.amino_acids)):
-            for acid2 in range(acid1+3, len(self.amino_acids)):
-
-                # check whether the amino acids are adjacent
-                if self.is_adjacent(amino_list[acid1][0], amino_list[acid2][0]):
-
-                    # Assign points based on bond type
-                    if set(amino_list[acid1][1] + amino_list[acid2][1]) == {'H'}:
-                        self.adjacent_amino_acids[(amino_list[acid1][0], amino_list[acid2][0])] = 'H-H'
-                        score -= 1
-                    elif set(amino_list[acid1][1] + amino_list[acid2][1]) == {'H', 'C'}:
-                        self.adjacent_amino_acids[(amino_list[acid1][0], amino_list[acid2][0])] = 'H-C'
-                        score -= 1
-                    elif set(amino_list[acid1][1] + amino_list[acid2][1]) == {'C'}:
-                        self.adjacent_amino_acids[(amino_list[acid1][0], amino_list[acid2][0])] = 'C-C'
-                        score -= 5
-
-        return score
+        return self.score
 
     def is_adjacent(self, coordinate1: tuple[int, int, int], coordinate2: tuple[int, int, int]):
         """
@@ -90,6 +145,40 @@ class Protein():
             type (str): The type of the amino acid ('H', 'P', 'C').
 
         This method ensures that the coordinate is not None before adding it to the dictionary.
+        The bonds the new amino acid forms with its 4 (2D) or 6 (3D) neighbours are added to the score.
         """
         if coordinate is not None:
+            # an occupied coordinate means the fold is invalid, so the score is left as is
+            if coordinate not in self.amino_acids:
+                index = len(self.amino_acids)
+                for neighbour, partner, points in self.bonds(self.positions, coordinate, self.pair_weights[index], self.directions):
+                    self.adjacent_amino_acids[(neighbour, coordinate)] = BOND_LABELS[self.codes[partner]][self.codes[index]]
+                    self.score += points
+                self.positions[coordinate] = index
+
             self.amino_acids[coordinate] = type
+
+    @staticmethod
+    def bonds(positions: dict, coordinate: tuple[int, int, int], weights: tuple, directions: list[tuple[int, int, int]]):
+        """
+        Finds the bonds a new amino acid would form with the amino acids already placed.
+
+        The points come from the row of pair_weights of the new amino acid, which is 0 for the
+        amino acid it is connected to, for types that do not bond and for positions of the same
+        parity, so only the neighbours with points are left to check.
+
+        Parameters:
+            positions (dict): The position in the chain of every placed amino acid, {coordinate: index}.
+            coordinate (tuple): The (x, y, z) coordinates of the new amino acid.
+            weights (tuple): The points of a bond of the new amino acid with every amino acid, its row of pair_weights.
+            directions (list): The possible neighbouring positions, in 2D or 3D.
+
+        Yields:
+            tuple: (neighbour coordinate, neighbour index, points) for every bond that is formed.
+        """
+        x, y, z = coordinate
+        for dx, dy, dz in directions:
+            neighbour = (x + dx, y + dy, z + dz)
+            partner = positions.get(neighbour)
+            if partner is not None and weights[partner]:
+                yield neighbour, partner, weights[partner]
@@ -0,0 +1,210 @@
+import json
+import os
+import struct
+from array import array
+from algorithms.algorithm_class import Algorithm
+from classes.protein_class import AMINO_ACIDS, AMINO_CODES
+from classes.visualise_class import Visualise
+
+# One record per result: offset of its data, length of the sequence, length of the
+# parameters, score, algorithm code, 3D flag, one byte of padding and the seconds it took
+RECORD = struct.Struct("<QIIiHBxd")
+
+# Names of the record fields, in the order of RECORD, see ResultsStore.records
+RECORD_FIELDS = [
+    ("offset", "<u8"), ("length", "<u4"), ("parameters length", "<u4"), ("score", "<i4"),
+    ("algorithm", "<u2"), ("threeD", "u1"), ("padding", "u1"), ("seconds", "<f8")
+]
+
+class ResultsStore():
+    """
+    An append-only binary store of the results of many runs, in a directory of three files:
+
+    - records.bin: one record of RECORD.size bytes per result (see RECORD), which NumPy can
+      map into memory as a structured array, so the scores, algorithms and running times of
+      all results can be read without parsing.
+    - data.bin: per result the sequence as one byte per amino acid (the index in AMINO_ACIDS),
+      the folds as int8 and the parameters as JSON.
+    - algorithms.json: the names of the algorithms, which the records refer to by index.
+
+    The data of a result is written before its record, so a run that crashes while adding
+    a result leaves no incomplete record behind. Only one process should add results at a time.
+    """
+    def __init__(self, directory: str):
+        """
+        Opens the store in a directory, which is created if it does not exist.
+
+        Parameters:
+            directory (str): The directory of the store.
+        """
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.records_file = os.path.join(directory, "records.bin")
+        self.data_file = os.path.join(directory, "data.bin")
+        self.algorithms_file = os.path.join(directory, "algorithms.json")
+
+        self.algorithms = []
+        if os.path.exists(self.algorithms_file):
+            with open(self.algorithms_file, 'r') as file:
+                self.algorithms = json.load(file)
+
+    def __len__(self):
+        """
+        Returns:
+            int: The number of results in the store.
+        """
+        if not os.path.exists(self.records_file):
+            return 0
+        return os.path.getsize(self.records_file) // RECORD.size
+
+    def append(self, sequence: str, folds: list[int], score: int, algorithm: str, parameters: dict = None,
+               seconds: float = 0.0, threeD: bool = False):
+        """
+        Adds a result to the store.
+
+        Parameters:
+            sequence (str): The sequence of amino acids.
+            folds (list[int]): The fold directions, one per amino acid, as in Protein.folds.
+            score (int): The score of the fold.
+            algorithm (str): The name of the algorithm that found the fold.
+            parameters (dict): The parameters of the run, stored as JSON.
+            seconds (float): The number of seconds the run took.
+            threeD (bool): Indicates if the protein was folded in 3D.
+
+        Returns:
+            int: The index of the result.
+        """
+        if len(folds) != len(sequence):
+            raise ValueError("A result needs one fold per amino acid.")
+
+        if algorithm not in self.algorithms:
+            self.algorithms.append(algorithm)
+            with open(self.algorithms_file + ".tmp", 'w') as file:
+                json.dump(self.algorithms, file)
+            os.replace(self.algorithms_file + ".tmp", self.algorithms_file)
+
+        encoded_parameters = json.dumps(parameters or {}, sort_keys=True).encode()
+        data = (
+            bytes(AMINO_CODES[amino] for amino in sequence)
+            + array('b', folds).tobytes()
+            + encoded_parameters
+        )
+
+        with open(self.data_file, 'ab') as file:
+            offset = file.tell()
+            file.write(data)
+
+        with open(self.records_file, 'ab') as file:
+            file.write(RECORD.pack(
+                offset, len(sequence), len(encoded_parameters), score,
+                self.algorithms.index(algorithm), threeD, seconds
+            ))
+
+        return len(self) - 1
+
+    def records(self):
+        """
+        Maps the records into memory as a NumPy structured array, without copying them.
+
+        Returns:
+            np.ndarray: The records, with the fields of RECORD_FIELDS.
+        """
+        import numpy as np
+
+        length = len(self)
+        if length == 0:
+            return np.zeros(0, dtype=RECORD_FIELDS)
+        return np.memmap(self.records_file, dtype=RECORD_FIELDS, mode='r', shape=(length,))
+
+    def data(self):
+        """
+        Maps the data of all results into memory as a NumPy array of bytes, without copying it.
+
+        Returns:
+            np.ndarray: The bytes of data.bin.
+        """
+        import numpy as np
+
+        if not os.path.exists(self.data_file) or os.path.getsize(self.data_file) == 0:
+            return np.zeros(0, dtype=np.uint8)
+        return np.memmap(self.data_file, dtype=np.uint8, mode='r')
+
+    def folds(self, index: int, records=None, data=None):
+        """
+        Gives the folds of a result as a view into the mapped data.
+
+        Parameters:
+            index (int): The index of the result.
+            records, data: The mapped records and data, to reuse them over many results.
+
+        Returns:
+            np.ndarray: The int8 fold directions.
+        """
+        record = (records if records is not None else self.records())[index]
+        data = data if data is not None else self.data()
+        start = int(record["offset"]) + int(record["length"])
+        return data[start:start + int(record["length"])].view('i1')
+
+    def result(self, index: int):
+        """
+        Reads a result completely.
+
+        Parameters:
+            index (int): The index of the result.
+
+        Returns:
+            dict: The sequence, folds, score, algorithm, parameters, seconds and 3D flag of the result.
+        """
+        offset, length, parameters_length, score, algorithm, threeD, seconds = RECORD.unpack(
+            self.read(self.records_file, index * RECORD.size, RECORD.size)
+        )
+        data = self.read(self.data_file, offset, 2 * length + parameters_length)
+        folds = array('b')
+        folds.frombytes(data[length:2 * length])
+
+        return {
+            "sequence": "".join(AMINO_ACIDS[code] for code in data[:length]),
+            "folds": folds.tolist(),
+            "score": score,
+            "algorithm": self.algorithms[algorithm],
+            "parameters": json.loads(data[2 * length:]),
+            "seconds": seconds,
+            "threeD": bool(threeD)
+        }
+
+    def read(self, filename: str, offset: int, size: int):
+        """
+        Reads a number of bytes from a file of the store.
+
+        Returns:
+            bytes: The bytes that were read.
+        """
+        with open(filename, 'rb') as file:
+            file.seek(offset)
+            return file.read(size)
+
+    def to_protein(self, index: int):
+        """
+        Rebuilds the protein of a result from its folds, with Algorithm.calculate_protein.
+
+        Parameters:
+            index (int): The index of the result.
+
+        Returns:
+            Protein: The folded protein, with its folds.
+        """
+        result = self.result(index)
+        protein = Algorithm(result["sequence"], 1, None, result["threeD"]).calculate_protein(result["folds"])
+        protein.folds = result["folds"]
+        return protein
+
+    def export_csv(self, index: int, output_file: str):
+        """
+        Writes a result to a CSV file in the format of Visualise.data_to_csv.
+
+        Parameters:
+            index (int): The index of the result.
+            output_file (str): The path/filename for the output CSV.
+        """
+        protein = self.to_protein(index)
+        Visualise.data_to_csv(protein.amino_acids, protein.folds, output_file, protein)
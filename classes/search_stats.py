@@ -0,0 +1,133 @@
+import cProfile
+import json
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+class SearchStats():
+    """
+    Counters and timers of a search, reported per step.
+
+    The algorithms count events (states expanded, calls of check_legal_moves, lookahead
+    nodes, ...) and time phases of their steps while a SearchStats is attached to them (see
+    Algorithm.instrument). At the end of every step the counts are written as one JSON line,
+    and at the end of the run a summary table of all steps is printed. The whole run can
+    also be profiled with cProfile.
+    """
+    def __init__(self, output_file: str = None, profile_file: str = None):
+        """
+        Initializes the counters and timers.
+
+        Parameters:
+            output_file (str): The file to write a JSON line to for every step, None for the summary only.
+            profile_file (str): The file to write the cProfile statistics of the run to, None to not profile.
+        """
+        self.output_file = output_file
+        self.profile_file = profile_file
+
+        # counts and seconds per phase of the current step and of all steps together
+        self.counts = Counter()
+        self.seconds = Counter()
+        self.total_counts = Counter()
+        self.total_seconds = Counter()
+
+        self.steps = 0
+        self.file = None
+        self.profiler = None
+        self.start_time = None
+
+    def start(self):
+        """
+        Starts the run: opens the output file and starts the profiler.
+        """
+        if self.output_file is not None:
+            self.file = open(self.output_file, 'w')
+        if self.profile_file is not None:
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+        self.start_time = time.perf_counter()
+
+    def count(self, name: str, amount: int = 1):
+        """
+        Counts an event in the current step.
+
+        Parameters:
+            name (str): The name of the counter.
+            amount (int): The number of events.
+        """
+        self.counts[name] += amount
+
+    @contextmanager
+    def phase(self, name: str):
+        """
+        Times a phase of the current step, as in `with stats.phase("expand"): ...`.
+
+        Parameters:
+            name (str): The name of the phase.
+        """
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[name] += time.perf_counter() - start_time
+
+    def end_step(self, **info):
+        """
+        Ends the current step: writes its JSON line and adds its counts to the totals.
+        Steps in which nothing was counted or timed are skipped.
+
+        Parameters:
+            info: Fields that describe the step, such as the position in the sequence.
+        """
+        if not self.counts and not self.seconds:
+            return
+
+        if self.file is not None:
+            record = {"step": self.steps, **info, "counts": dict(self.counts), "seconds": dict(self.seconds)}
+            self.file.write(json.dumps(record) + "\n")
+
+        self.steps += 1
+        self.total_counts.update(self.counts)
+        self.total_seconds.update(self.seconds)
+        self.counts.clear()
+        self.seconds.clear()
+
+    def finish(self):
+        """
+        Ends the run: ends the last step, stops the profiler, closes the output file and prints the summary.
+        """
+        self.end_step()
+        total_time = time.perf_counter() - self.start_time
+
+        if self.profiler is not None:
+            self.profiler.disable()
+            self.profiler.dump_stats(self.profile_file)
+            self.profiler = None
+            print(f"\nProfile written to {self.profile_file}")
+
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+        print()
+        print(self.summary(total_time))
+
+    def summary(self, total_time: float):
+        """
+        Makes a table of the totals and the averages per step of all counters and phases.
+
+        Parameters:
+            total_time (float): The duration of the run in seconds.
+
+        Returns:
+            str: The table.
+        """
+        steps = max(self.steps, 1)
+        lines = [f"{'':25} {'total':>14} {'per step':>14}"]
+        for name, count in sorted(self.total_counts.items()):
+            lines.append(f"{name:25} {count:>14} {count / steps:>14.1f}")
+        for name, seconds in sorted(self.total_seconds.items()):
+            lines.append(f"{name + ' (s)':25} {seconds:>14.3f} {seconds / steps:>14.5f}")
+        lines.append(f"{'steps':25} {self.steps:>14}")
+        lines.append(f"{'run (s)':25} {total_time:>14.3f}")
+        return "\n".join(lines)
@@ -0,0 +1,61 @@
+from collections import OrderedDict
+
+class TranspositionTable():
+    """
+    A bounded least-recently-used cache for search results of partial folds.
+
+    Every key holds the results for one position in the search, stored per remaining
+    search depth. When the table is full the least recently used key is removed.
+    """
+    def __init__(self, max_size: int):
+        """
+        Initializes an empty table.
+
+        Parameters:
+            max_size (int): The maximum number of keys kept in the table.
+        """
+        self.max_size = max_size
+        self.table = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, depth: int):
+        """
+        Looks up the stored result of a key for the given remaining depth.
+
+        Parameters:
+            key: A hashable description of the search position.
+            depth (int): The remaining search depth.
+
+        Returns:
+            The stored result, or None if the position was not searched to this depth.
+        """
+        results = self.table.get(key)
+        if results is not None and depth in results:
+            self.table.move_to_end(key)
+            self.hits += 1
+            return results[depth]
+
+        self.misses += 1
+        return None
+
+    def put(self, key, depth: int, value):
+        """
+        Stores the result of a key for the given remaining depth.
+
+        Parameters:
+            key: A hashable description of the search position.
+            depth (int): The remaining search depth.
+            value: The result to store.
+        """
+        results = self.table.get(key)
+        if results is None:
+            results = self.table[key] = {}
+            if len(self.table) > self.max_size:
+                self.table.popitem(last=False)
+        else:
+            self.table.move_to_end(key)
+        results[depth] = value
+
+    def __len__(self):
+        return len(self.table)
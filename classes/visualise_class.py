@@ -1,15 +1,13 @@
-import matplotlib.pyplot as plt
 import csv
-import numpy as np
-from scipy.stats import norm
 from collections import Counter
-from mpl_toolkits.mplot3d import Axes3D
-from matplotlib.lines import Line2D
 from collections import OrderedDict
 
 class Visualise():
     """
     A class to visualize protein folds in 2D or 3D space, using data from a Protein instance.
+
+    The plotting libraries (matplotlib, NumPy and SciPy) are only imported by the methods
+    that draw, so writing a CSV file does not pay for loading them.
     """
 
     @staticmethod
@@ -35,6 +33,12 @@ class Visualise():
         Returns:
             None
         """
+        import numpy as np
+        import matplotlib.pyplot as plt
+        from matplotlib.lines import Line2D
+        if protein.threeD:
+            from mpl_toolkits.mplot3d import Axes3D
+
         amino_colors = {'H': 'red', 'P': 'yellow', 'C': 'blue'}
         line_colors = {'H-H': 'red', 'H-C': 'black', 'C-C': 'blue'}
         scatter_handles = []
@@ -151,6 +155,10 @@ class Visualise():
             - Properly scales Gaussian curve
             - Ensures plot clarity
         """
+        import numpy as np
+        import matplotlib.pyplot as plt
+        from scipy.stats import norm
+
         # Count frequencies
         counter = Counter(scores)
         unique_scores = sorted(counter.keys())
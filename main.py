@@ -4,11 +4,26 @@
 
 from classes.protein_class import Protein
 from classes.visualise_class import Visualise
+from classes.results_store import ResultsStore
 from algorithms.algorithm_class import Algorithm
 from algorithms.random_folding import RandomFolding
 from algorithms.beam import Beam
+from algorithms.branch_and_bound import BranchAndBound
+from algorithms.hill_climber import HillClimber
+from algorithms.replica_exchange import ReplicaExchange
+from algorithms.perm import PERM
+from multiprocessing import Pool
 import argparse
-import matplotlib.pyplot as plt
+import contextlib
+import csv
+import io
+import time
+
+# Columns of the results file of a batch, see run_batch
+RESULT_COLUMNS = [
+    "job", "sequence", "algorithm", "iterations", "lookahead", "threeD", "seed", "time budget",
+    "score", "folds", "seconds", "error"
+]
 
 def file_to_parameters(filename):
     """
@@ -21,11 +36,16 @@ def file_to_parameters(filename):
             algorithm = data[1].split('=')[1].strip().lower()
             iterations = int(data[2].split('=')[1].strip())
             lookahead_depth = int(data[3].split('=')[1].strip() or 0)
-        return algorithm, sequence, iterations, lookahead_depth
+
+            # the time budget in seconds is optional
+            time_budget = None
+            if len(data) > 4 and data[4].strip():
+                time_budget = float(data[4].split('=')[1].strip())
+        return algorithm, sequence, iterations, lookahead_depth, time_budget
     except (IndexError, ValueError) as e:
         raise ValueError("Invalid input file format. Ensure all fields are correctly specified.") from e
 
-def handle_error_conditions(sequence, algorithm, iterations, lookahead_depth):
+def handle_error_conditions(sequence, algorithm, iterations, lookahead_depth, time_budget=None):
     """
     Handles all the validation logic and shows relevant error messages for each input condition.
     Returns True if any error occurs, otherwise False.
@@ -43,23 +63,143 @@ def handle_error_conditions(sequence, algorithm, iterations, lookahead_depth):
     # Validate algorithm selection
     if algorithm == "":
         raise TypeError("Please select an algorithm.")
-    if algorithm == "Hill Climber":
-        raise TypeError("Hill Climber not yet implemented. Please select another one.")
 
     # Validate algorithm-specific entry
     if iterations == None:
         if algorithm == "random":
             raise TypeError("Please enter a value for the iterations.")
-        elif algorithm == "beam search":
+        elif algorithm in ("beam search", "beam heuristic"):
             raise TypeError("Please enter a value for the beams")
         else:
             print("To be finished")
 
+    # Validate the time budget
+    if time_budget is not None and time_budget <= 0:
+        raise ValueError("The time budget must be a positive number of seconds.")
+
     if not type(output_file) is str:
         raise TypeError("Please enter a string as a sequence")
     if not type(threeD) is bool:
         raise TypeError("Please enter a boolean for adding a 3rd dimension")
 
+def create_engine(algorithm, sequence, iterations, lookahead_depth, output_file, threeD):
+    """
+    Creates the engine of an algorithm with the parameters of an experiment.
+    """
+    if algorithm == "random":
+        return RandomFolding(sequence, iterations, output_file, threeD)
+    elif algorithm == "random batch":
+        return RandomFolding(sequence, iterations, output_file, threeD, mode="batch")
+    elif algorithm == "random growth":
+        return RandomFolding(sequence, iterations, output_file, threeD, mode="growth")
+    elif algorithm == "beam search":
+        return Beam(sequence, iterations, output_file, threeD, lookahead_depth=lookahead_depth)
+    elif algorithm == "beam heuristic":
+        return Beam(sequence, iterations, output_file, threeD, heuristic=True)
+    elif algorithm == "branch and bound":
+        return BranchAndBound(sequence, output_file, threeD)
+    elif algorithm == "hill climber":
+        return HillClimber(sequence, iterations, output_file, threeD)
+    elif algorithm == "simulated annealing":
+        return HillClimber(sequence, iterations, output_file, threeD, schedule="exponential", temperature=2.0)
+    elif algorithm == "replica exchange":
+        return ReplicaExchange(sequence, iterations, output_file, threeD)
+    elif algorithm == "perm":
+        return PERM(sequence, iterations, output_file, threeD)
+    else:
+        raise ValueError(f"Unknown algorithm '{algorithm}'.")
+
+def read_manifest(filename, seed=None):
+    """
+    Parses the manifest of a batch: a csv file with a header and one job per row, with the
+    columns sequence, algorithm, iterations, lookahead and threeD, and optionally seed and
+    time budget. Without a seed column every job gets the given seed plus its number.
+    All jobs are checked before any of them runs.
+    """
+    jobs = []
+    with open(filename, 'r', newline='') as file:
+        for number, row in enumerate(csv.DictReader(file, skipinitialspace=True)):
+            try:
+                sequence = row["sequence"].strip().upper()
+                algorithm = row["algorithm"].strip().lower()
+                iterations = int(row["iterations"])
+                lookahead_depth = int(row.get("lookahead") or 0)
+                threeD = (row.get("threeD") or "").strip().lower() in ("1", "true", "yes", "3d")
+                job_seed = int(row["seed"]) if row.get("seed") else (seed + number if seed is not None else None)
+                time_budget = float(row["time budget"]) if row.get("time budget") else None
+            except (KeyError, AttributeError, ValueError) as e:
+                raise ValueError(f"Invalid job on row {number + 2} of {filename}.") from e
+
+            handle_error_conditions(sequence, algorithm, iterations, lookahead_depth, time_budget)
+            jobs.append((number, sequence, algorithm, iterations, lookahead_depth, threeD, job_seed, time_budget))
+    return jobs
+
+def run_job(job):
+    """
+    Runs one job of a batch without output files, plots or printing, and returns its row
+    of the results file. A job that fails is reported in the error column, so the other
+    jobs of the batch continue.
+    """
+    number, sequence, algorithm, iterations, lookahead_depth, threeD, seed, time_budget = job
+    row = {
+        "job": number, "sequence": sequence, "algorithm": algorithm, "iterations": iterations,
+        "lookahead": lookahead_depth, "threeD": threeD, "seed": seed, "time budget": time_budget
+    }
+
+    start_time = time.perf_counter()
+    try:
+        engine = create_engine(algorithm, sequence, iterations, lookahead_depth, None, threeD)
+
+        # the jobs already fill the pool, so the engines do not start processes of their own
+        if isinstance(engine, ReplicaExchange):
+            engine.workers = 1
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            engine.run_iterations(1, seed, time_budget)
+
+        if engine.best_protein is None:
+            row["error"] = "No valid fold was found within the time budget."
+        else:
+            row["score"] = engine.best_score
+            row["folds"] = " ".join(str(fold) for fold in engine.best_protein.folds)
+    except Exception as e:
+        row["error"] = f"{type(e).__name__}: {e}"
+
+    row["seconds"] = round(time.perf_counter() - start_time, 3)
+    return row
+
+def run_batch(manifest, results_file, workers, seed=None, store=None):
+    """
+    Runs all jobs of a manifest spread over a pool of worker processes, one job per process
+    at a time. Every result is written to the results file as soon as its job finishes, so
+    the rows are in the order the jobs finished; the job column gives their order in the manifest.
+    The folds that were found are also added to the results store in the given directory, if any.
+    """
+    jobs = read_manifest(manifest, seed)
+    store = ResultsStore(store) if store is not None else None
+    print(f"Running {len(jobs)} jobs with {workers} workers.")
+
+    with open(results_file, 'w', newline='') as file:
+        writer = csv.DictWriter(file, fieldnames=RESULT_COLUMNS)
+        writer.writeheader()
+        file.flush()
+
+        with Pool(workers) if workers > 1 else contextlib.nullcontext() as pool:
+            results = pool.imap_unordered(run_job, jobs) if pool is not None else map(run_job, jobs)
+            for finished, row in enumerate(results, start=1):
+                writer.writerow(row)
+                file.flush()
+
+                if store is not None and "score" in row:
+                    parameters = {"iterations": row["iterations"], "lookahead": row["lookahead"], "seed": row["seed"], "time budget": row["time budget"]}
+                    folds = [int(fold) for fold in row["folds"].split()]
+                    store.append(row["sequence"], folds, row["score"], row["algorithm"], parameters, row["seconds"], row["threeD"])
+
+                outcome = f"score {row['score']}" if "score" in row else row["error"]
+                print(f"[{finished}/{len(jobs)}] job {row['job']} ({row['algorithm']}, {row['sequence']}): {outcome} in {row['seconds']} s")
+
+    print(f"Results written to {results_file}")
+
 if __name__ == '__main__':
 
     # parse the input sequence
@@ -67,12 +207,18 @@ if __name__ == '__main__':
 
     parser.add_argument(
     'experiment',
-    help="A .txt file containing the paramters that will be used by the algorithm"
+    help="A .txt file containing the paramters that will be used by the algorithm, or the manifest of a batch with -batch"
     )
 
     parser.add_argument(
     'output_file',
-    help="The name of the csv file to put the data in"
+    help="The name of the csv file to put the data in, or the results of all jobs with -batch"
+    )
+
+    parser.add_argument(
+    '-batch',
+    action='store_true',
+    help="Run all jobs of a csv manifest in parallel over the workers, without plots"
     )
 
     parser.add_argument(
@@ -81,18 +227,107 @@ if __name__ == '__main__':
     help="A flag that changes the algorithm to work in three-dimensional space rather than two-dimensional space"
     )
 
+    parser.add_argument(
+    '-no_plot', '--no-plot',
+    dest='no_plot',
+    action='store_true',
+    help="Only write the csv file, without drawing the fold; matplotlib is then not loaded at all"
+    )
+
+    parser.add_argument(
+    '-workers',
+    type=int,
+    default=1,
+    help="The number of processes to spread the iterations over"
+    )
+
+    parser.add_argument(
+    '-seed',
+    type=int,
+    default=None,
+    help="The seed of the random number generators, for reproducible results"
+    )
+
+    parser.add_argument(
+    '-stats',
+    nargs='?',
+    const='',
+    default=None,
+    help="Print counters and timers of the search, and write them per step as JSON lines to the given file"
+    )
+
+    parser.add_argument(
+    '-profile',
+    default=None,
+    help="Profile the run with cProfile and write the statistics to the given file"
+    )
+
+    parser.add_argument(
+    '-store',
+    default=None,
+    help="Also add the best fold to the binary results store in the given directory"
+    )
+
+    parser.add_argument(
+    '-checkpoint',
+    default=None,
+    help="Write the state of the search to the given file regularly, so it can be resumed with -resume"
+    )
+
+    parser.add_argument(
+    '-checkpoint_interval',
+    type=float,
+    default=60,
+    help="The number of seconds between two checkpoints"
+    )
+
+    parser.add_argument(
+    '-resume',
+    default=None,
+    help="Continue the search from the checkpoint in the given file"
+    )
+
     # # convert to variables for legibility
     args = parser.parse_args()
     experiment = args.experiment
     output_file = args.output_file
     threeD = args.threeD
+    no_plot = args.no_plot
+    workers = args.workers
+    seed = args.seed
+    stats = args.stats
+    profile = args.profile
+    checkpoint = args.checkpoint
+    checkpoint_interval = args.checkpoint_interval
+    resume = args.resume
+    store = args.store
 
-    algorithm, sequence, iterations, lookahead_depth = file_to_parameters(experiment)
-    handle_error_conditions(sequence, algorithm, iterations, lookahead_depth)
+    if args.batch:
+        # run all jobs of the manifest without plots
+        run_batch(experiment, output_file, workers, seed, store)
+    else:
+        algorithm, sequence, iterations, lookahead_depth, time_budget = file_to_parameters(experiment)
+        handle_error_conditions(sequence, algorithm, iterations, lookahead_depth, time_budget)
 
-    if algorithm == "random":
-        RandomFolding(sequence, iterations, output_file, threeD).run_experiment()
-    elif algorithm == "beam search":
-        Beam(sequence, iterations, output_file, threeD).run_experiment()
+        engine = create_engine(algorithm, sequence, iterations, lookahead_depth, output_file, threeD)
+        engine.plot = not no_plot
+
+        if stats is not None or profile is not None:
+            engine.instrument(stats or None, profile)
+
+        if checkpoint is not None:
+            engine.enable_checkpoints(checkpoint, checkpoint_interval)
+        if resume is not None:
+            engine.resume(resume)
+
+        start_time = time.perf_counter()
+        engine.run_experiment(workers, seed, time_budget)
+        seconds = time.perf_counter() - start_time
+
+        if store is not None and engine.best_protein is not None:
+            parameters = {"iterations": iterations, "lookahead": lookahead_depth, "seed": seed, "time budget": time_budget, "workers": workers}
+            ResultsStore(store).append(sequence, engine.best_protein.folds, engine.best_score, algorithm, parameters, seconds, threeD)
 
-    plt.show()
+        if engine.plot and engine.best_protein is not None:
+            import matplotlib.pyplot as plt
+            plt.show()